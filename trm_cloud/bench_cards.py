@@ -0,0 +1,110 @@
+# trm_cloud/bench_cards.py
+# -*- coding: utf-8 -*-
+"""
+Kart çıkarma mikro-benchmark'ı
+------------------------------
+Kayıtlı HTML fixture'ları üzerinde eski yöntemi (her alan için kartı
+BeautifulSoup(str(c)) ile yeniden parse etmek) tek geçişlik extract_card ile
+karşılaştırır ve saniyede işlenen kart sayısını yazar.
+
+Koşum:
+    python trm_cloud/bench_cards.py [fixture.html ...]
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from scrape_products import (
+    SELECTORS,
+    extract_card,
+    find_product_cards,
+    first_text,
+    pick_first,
+    price_to_float,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+BASE_URL = "https://www.trendurunlermarket.com/giyim-C4/"
+MIN_SECONDS = 1.0  # her ölçüm en az bu kadar sürsün
+
+
+def legacy_extract(card, base_url: str) -> Dict:
+    # Eski scrape_category içindeki mantık (karşılaştırma için birebir)
+    link_el = pick_first(BeautifulSoup(str(card), "html.parser"), SELECTORS["link"])
+    href = link_el.get("href").strip() if link_el and link_el.get("href") else ""
+    full = urljoin(base_url, href) if href else ""
+    title = first_text(pick_first(BeautifulSoup(str(card), "html.parser"), SELECTORS["title"]))
+    price_val = price_to_float(first_text(pick_first(BeautifulSoup(str(card), "html.parser"), SELECTORS["price"])))
+    sku_el = pick_first(BeautifulSoup(str(card), "html.parser"), SELECTORS["sku"])
+    sku = ""
+    if sku_el:
+        sku = sku_el["data-sku"] if sku_el.has_attr("data-sku") else first_text(sku_el)
+    return {
+        "sku": sku or "",
+        "name": title or "",
+        "price": price_val if price_val is not None else "",
+        "url": full or "",
+    }
+
+
+def fixture_paths(argv: List[str]) -> List[str]:
+    if argv:
+        return argv
+    return sorted(
+        os.path.join(FIXTURE_DIR, fn)
+        for fn in os.listdir(FIXTURE_DIR)
+        if fn.endswith(".html")
+    )
+
+
+def measure(fn, cards) -> float:
+    # cards/sn; kısa sürerse tekrar eder
+    done = 0
+    t0 = time.perf_counter()
+    while True:
+        for c in cards:
+            fn(c, BASE_URL)
+        done += len(cards)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_SECONDS:
+            return done / elapsed
+
+
+def main(argv: List[str]):
+    paths = fixture_paths(argv)
+    if not paths:
+        print(f"[BENCH] Fixture bulunamadı: {FIXTURE_DIR}")
+        return
+
+    for fp in paths:
+        with open(fp, "r", encoding="utf-8") as f:
+            page = BeautifulSoup(f.read(), "html.parser")
+        cards = find_product_cards(page)
+        if not cards:
+            print(f"[BENCH] {os.path.basename(fp)}: kart yok, atlandı.")
+            continue
+
+        # iki yol aynı sonucu vermeli (eski yol görsel çıkarmıyordu)
+        for c in cards:
+            new = extract_card(c, BASE_URL)
+            new.pop("image", None)
+            if legacy_extract(c, BASE_URL) != new:
+                print(f"[BENCH] UYARI: {os.path.basename(fp)} için sonuçlar farklı.")
+                break
+
+        old = measure(legacy_extract, cards)
+        new = measure(extract_card, cards)
+        print(
+            f"[BENCH] {os.path.basename(fp)}: {len(cards)} kart | "
+            f"eski {old:,.0f} kart/sn | yeni {new:,.0f} kart/sn | x{new / old:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,77 @@
+# trm_cloud/bench_discovery.py
+# -*- coding: utf-8 -*-
+"""
+Sitemap keşfi + ürün sayfası hızlı yolu benchmark'ı
+---------------------------------------------------
+fixtures/sitemap.xml (index → sitemap_products.xml) akışla okunur; her ürün
+adresi sırayla bir fixture ürün sayfasına (JSON-LD / itemprop / yalnızca
+seçici) eşlenir ve iki yöntemle parse edilir:
+    eski: tüm sayfa BeautifulSoup + seçici zinciri
+    yeni: sitemap.extract_product (JSON-LD → itemprop → seçiciler)
+Çıkan alanlar ve saniyede işlenen ürün sayısı yazılır; iki yöntemin aynı
+ürünü bulduğu da kontrol edilir.
+
+Koşum:
+    python trm_cloud/bench_discovery.py [tur_sayisi]
+"""
+
+import os
+import sys
+import time
+from itertools import cycle
+
+from bs4 import BeautifulSoup
+
+import extractors
+import sitemap
+from parse_stage import PARSER
+from prices import parse_price
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+SITEMAP = os.path.join(FIXTURE_DIR, "sitemap.xml")
+PAGES = ["product_jsonld.html", "product_itemprop.html", "product_plain.html"]
+PROFILE = "trm_products"
+
+
+def legacy(content: bytes):
+    page = BeautifulSoup(content, PARSER)
+    return extractors.extract_card(page, extractors.PROFILES[PROFILE])
+
+
+def main(argv):
+    rounds = int(argv[0]) if argv else 20
+    urls = list(sitemap.iter_product_urls(SITEMAP))
+    pages = {}
+    for name in PAGES:
+        with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+            pages[name] = f.read()
+    work = list(zip(urls, cycle(PAGES)))
+    print(f"[BENCH] sitemap: {len(urls)} ürün adresi ({SITEMAP})")
+
+    sources = {}
+    for url, name in work[:len(PAGES)]:
+        raw, source = sitemap.extract_product(pages[name], url, PARSER)
+        old = legacy(pages[name])
+        same = raw["name"] == old["name"] and parse_price(raw["price"]) == parse_price(old["price"])
+        print(f"[BENCH] {name}: {source} | {raw['sku']} | {raw['name']} | {raw['price']} | eski ile aynı: {same}")
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for url, name in work:
+            legacy(pages[name])
+    old_rate = rounds * len(work) / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for url, name in work:
+            _, source = sitemap.extract_product(pages[name], url, PARSER)
+            sources[source] = sources.get(source, 0) + 1
+    new_rate = rounds * len(work) / (time.perf_counter() - t0)
+
+    print(f"[BENCH] {PARSER} | eski: {old_rate:,.0f} ürün/sn | yeni: {new_rate:,.0f} ürün/sn | x{new_rate / old_rate:.1f}")
+    print("[BENCH] kaynak: " + " | ".join(f"{k}: {v}" for k, v in sorted(sources.items())))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+# trm_cloud/bench_links.py
+# -*- coding: utf-8 -*-
+"""
+UTM link üretimi benchmark'ı
+----------------------------
+Geçici bir ürün kataloğu (varsayılan 1M satır) üretir; eski yol (tüm dosya
+listeye, satır/kombinasyon başına quote_plus, DictWriter) ile akış halindeki
+build_links'i aynı kombinasyon matrisiyle karşılaştırır ve link/sn yazar.
+
+Koşum:
+    python trm_cloud/bench_links.py [satir_sayisi] [kombinasyon_sayisi]
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+
+from link_builder import build_links, encode_name
+
+WORDS = ["Acer", "Kablosuz", "Kulaklık", "Şarj", "Aleti", "Siyah", "Beyaz", "Pro", "Mini", "Çanta"]
+
+
+def make_catalog(path: Path, rows: int):
+    # ~%20'si tekrar eden adlar (varyantlar, farklı kategoriler)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["sku", "name", "price", "url"])
+        for i in range(rows):
+            k = i if i % 5 else i // 5
+            name = f"{WORDS[k % 10]} {WORDS[(k // 10) % 10]} {WORDS[(k // 100) % 10]} Model {k}"
+            w.writerow([f"S{i}", name, f"{(i % 900) + 9.9:.2f}", f"https://example.com/p/{i}"])
+
+
+def legacy(src: Path, dst: Path, combos) -> int:
+    with src.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    out_rows = []
+    for r in rows:
+        name = r.get("name", "").strip()
+        if not name:
+            continue
+        for k, p, c in combos:
+            q = urllib.parse.quote_plus(name)
+            link = f"https://trendurunlermarket.com/?s={q}&utm_source={k}&utm_medium={p}&utm_campaign={c}"
+            out_rows.append({"name": name, "price": r.get("price", ""), "utm_link": link})
+    with dst.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["name", "price", "utm_link"])
+        writer.writeheader()
+        for row in out_rows:
+            writer.writerow(row)
+    return len(out_rows)
+
+
+def main(argv):
+    rows = int(argv[0]) if argv else 1_000_000
+    n_combos = int(argv[1]) if len(argv) > 1 else 4
+    combos = [(k, m, "trm") for k in ("telegram", "instagram", "whatsapp", "x") for m in ("bot", "story")][:n_combos]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "catalog.csv"
+        t0 = time.perf_counter()
+        make_catalog(src, rows)
+        print(f"[BENCH] katalog: {rows:,} satır, {os.path.getsize(src) / 1e6:.1f} MB ({time.perf_counter() - t0:.1f} sn)")
+
+        t0 = time.perf_counter()
+        n_old = legacy(src, Path(tmp) / "old.csv", combos)
+        old = n_old / (time.perf_counter() - t0)
+
+        encode_name.cache_clear()
+        t0 = time.perf_counter()
+        n_new = build_links(src, Path(tmp) / "new.csv", combos)
+        new = n_new / (time.perf_counter() - t0)
+
+    info = encode_name.cache_info()
+    print(f"[BENCH] {len(combos)} kombinasyon | eski {old:,.0f} link/sn | yeni {new:,.0f} link/sn | x{new / old:.1f}")
+    print(f"[BENCH] encode önbelleği: {info.hits:,} isabet / {info.misses:,} ıska")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,50 @@
+# trm_cloud/bench_parse.py
+# -*- coding: utf-8 -*-
+"""
+Parse aşaması ölçeklenme benchmark'ı
+------------------------------------
+Fixture sayfalarını ParseStage'e (ProcessPoolExecutor) farklı süreç
+sayılarıyla verir ve saniyede parse edilen sayfa sayısını yazar.
+
+Koşum:
+    python trm_cloud/bench_parse.py [sayfa_sayisi]
+"""
+
+import os
+import sys
+import time
+
+from parse_stage import PARSER, ParseStage
+from scrape_products import parse_html
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(HERE, "fixtures", "category_page.html")
+BASE_URL = "https://www.trendurunlermarket.com/giyim-C4/"
+
+
+def main(argv):
+    pages = int(argv[0]) if argv else 200
+    with open(FIXTURE, "rb") as f:
+        content = f.read()
+
+    t0 = time.perf_counter()
+    for _ in range(pages):
+        parse_html(content, BASE_URL, PARSER)
+    base = pages / (time.perf_counter() - t0)
+    print(f"[BENCH] {PARSER} | tek thread: {base:,.1f} sayfa/sn")
+
+    procs = 1
+    while procs <= (os.cpu_count() or 1):
+        with ParseStage(procs, parser=PARSER) as stage:
+            stage.parse(content, BASE_URL)  # süreçleri ısıt
+            t0 = time.perf_counter()
+            futs = [stage.submit(content, BASE_URL) for _ in range(pages)]
+            for fut in futs:
+                fut.result()
+            rate = pages / (time.perf_counter() - t0)
+        print(f"[BENCH] {PARSER} | {procs} süreç: {rate:,.1f} sayfa/sn | x{rate / base:.1f}")
+        procs *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
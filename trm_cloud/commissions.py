@@ -0,0 +1,51 @@
+# trm_cloud/commissions.py
+# -*- coding: utf-8 -*-
+"""
+Kategori bazlı komisyon oranları
+--------------------------------
+commission_rates.csv: category,rate  (rate kesir: 0.10 = %10)
+category, kategori URL'inin son parçasıdır (ör. .../giyim-C4/ → giyim-C4).
+Tabloda olmayan kategoriler çağıranın varsayılan oranını alır
+(scrape_products: TRM_DEFAULT_COMMISSION, %10; main.py: %18). Dağıtılan tablo
+boştur; bir kategoriye satır eklemek iki betikte de o oranı geçerli kılar.
+"""
+
+import csv
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+RATES_FILE = os.getenv(
+    "TRM_COMMISSION_RATES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "commission_rates.csv"),
+)
+
+_SLUG_RE = r"([^/?#]+)/*(?:[?#].*)?$"
+
+
+def load_rates(path: str = RATES_FILE) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    if not path or not os.path.exists(path):
+        return rates
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            key = (row.get("category") or "").strip()
+            try:
+                rates[key] = float(row.get("rate") or "")
+            except ValueError:
+                continue
+    return rates
+
+
+def category_key(col: pd.Series) -> pd.Series:
+    # "https://…/giyim-C4/" → "giyim-C4"; düz anahtar verilmişse olduğu gibi
+    return col.fillna("").astype(str).str.strip().str.extract(_SLUG_RE, expand=False)
+
+
+def rates_for(categories: Optional[pd.Series], rates: Dict[str, float], default: float,
+              index: Optional[pd.Index] = None) -> pd.Series:
+    """Her satırın oranı (float64); categories yoksa hepsi default."""
+    if categories is None:
+        return pd.Series(default, index=index, dtype="float64")
+    return category_key(categories).map(rates).fillna(default).astype("float64")
@@ -0,0 +1,151 @@
+# trm_cloud/dedupe.py
+# -*- coding: utf-8 -*-
+"""
+Ürün tekilleştirme aşaması (rapordan önce)
+------------------------------------------
+1) Kanonik URL (urls.canonical_url): izleme parametresi / sondaki "/" /
+   www. farkı olan aynı ürün tek satıra iner.
+2) Yakın kopya (isteğe bağlı, varsayılan kapalı): ürün adlarının karakter 3-gram kümeleri üzerinde MinHash
+   imzası (numpy) + LSH bantları. Yalnızca aynı kovaya düşen adaylar
+   karşılaştırılır; tüm katalogda ikinci dereceden tarama yoktur.
+   Tahmini Jaccard >= eşik ve fiyatı aynı (ya da biri boş) olan ürünler
+   aynı kümeye girer; kümeden ilk görülen satır kalır.
+   Beden / renk varyantları ("… Siyah Beden M" / "… Beden L") aynı fiyatla
+   0.9'un üstünde benzeşir ve ayrı ürün olduğu halde birleşir; bu yüzden
+   varsayılan yalnızca kanonik URL tekilleştirmesidir.
+
+Eşik: TRM_NEAR_DUP (varsayılan 0 = yakın kopya aşaması kapalı; örn. 0.9)
+"""
+
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from urls import canonical_url
+
+THRESHOLD = float(os.getenv("TRM_NEAR_DUP", "0") or "0")
+NUM_PERM = 64
+BANDS = 16           # 16 bant x 4 satır: ~0.5 benzerlikten itibaren aday
+SHINGLE = 3
+SMALL_BUCKET = 32    # bundan kalabalık kovalarda yalnızca ilk üyeyle kıyaslanır
+_PRIME = (1 << 31) - 1
+_CHUNK = 2000        # imza hesabında aynı anda işlenen ad sayısı
+
+_rng = np.random.RandomState(20240607)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+_TR_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    s = (name or "").replace("I", "ı").replace("İ", "i").lower().translate(_TR_FOLD)
+    return _NON_WORD.sub(" ", s).strip()
+
+
+def shingles(name: str) -> np.ndarray:
+    s = normalize_name(name)
+    if not s:
+        return np.zeros(0, dtype=np.uint64)
+    if len(s) <= SHINGLE:
+        grams = {s}
+    else:
+        grams = {s[i:i + SHINGLE] for i in range(len(s) - SHINGLE + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) % _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(names: Sequence[str]) -> np.ndarray:
+    """(len(names), NUM_PERM) imza matrisi; boş adların satırı tümüyle _PRIME."""
+    sig = np.full((len(names), NUM_PERM), _PRIME, dtype=np.uint64)
+    for start in range(0, len(names), _CHUNK):
+        parts = [shingles(n) for n in names[start:start + _CHUNK]]
+        lens = np.array([len(p) for p in parts])
+        rows = np.flatnonzero(lens)
+        if not len(rows):
+            continue
+        x = np.concatenate([parts[i] for i in rows])
+        # (a*x + b) mod p; a, x < 2^31 → çarpım uint64'e sığar
+        h = (_A[:, None] * x[None, :] + _B[:, None]) % _PRIME
+        offsets = np.concatenate(([0], np.cumsum(lens[rows])[:-1]))
+        sig[start + rows] = np.minimum.reduceat(h, offsets, axis=1).T
+    return sig
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # küçük sıra (ilk görülen) kök olur
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def near_duplicate_roots(names: Sequence[str], prices: Optional[Sequence] = None,
+                         threshold: float = THRESHOLD) -> List[int]:
+    """Her satır için kümesinin ilk satırının sırası (kopya değilse kendisi)."""
+    n = len(names)
+    uf = _UnionFind(n)
+    if n < 2 or threshold <= 0:
+        return list(range(n))
+    sig = minhash(names)
+    empty = sig[:, 0] == _PRIME
+    rows_per_band = NUM_PERM // BANDS
+    price = (pd.to_numeric(pd.Series(list(prices)), errors="coerce").round(2).to_numpy()
+             if prices is not None else np.full(n, np.nan))
+
+    for b in range(BANDS):
+        band = np.ascontiguousarray(sig[:, b * rows_per_band:(b + 1) * rows_per_band])
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for i in np.flatnonzero(~empty):
+            buckets[band[i].tobytes()].append(int(i))
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # küçük kovada tüm çiftler, kalabalık kovada yalnızca ilk üyeyle (numpy ile topluca)
+            m = np.array(members)
+            left = m if len(m) <= SMALL_BUCKET else m[:1]
+            sim = (sig[left][:, None, :] == sig[m][None, :, :]).mean(axis=2)
+            pl, pm = price[left][:, None], price[m][None, :]
+            ok = (sim >= threshold) & ((pl == pm) | np.isnan(pl) | np.isnan(pm))
+            for a, c in zip(*np.nonzero(np.triu(ok, 1) if len(left) > 1 else ok)):
+                if left[a] != m[c]:
+                    uf.union(int(left[a]), int(m[c]))
+    return [uf.find(i) for i in range(n)]
+
+
+def dedupe_frame(df: pd.DataFrame, threshold: float = THRESHOLD) -> pd.DataFrame:
+    """Kanonik URL + yakın kopya tekilleştirmesi; ilk görülen satırlar kalır."""
+    if df.empty:
+        return df
+    before = len(df)
+    if "url" in df:
+        canon = df["url"].fillna("").astype(str).map(canonical_url)
+        df = df[(canon == "") | ~canon.duplicated()]
+    by_url = before - len(df)
+
+    by_name = 0
+    if threshold > 0 and "name" in df and len(df) > 1:
+        names = df["name"].fillna("").astype(str).tolist()
+        prices = df["price"].tolist() if "price" in df else None
+        roots = near_duplicate_roots(names, prices, threshold)
+        keep = np.array([r == i for i, r in enumerate(roots)])
+        by_name = int((~keep).sum())
+        df = df[keep]
+
+    if by_url or by_name:
+        print(f"[DEDUPE] {before} → {len(df)} satır (URL varyantı {by_url}, yakın kopya {by_name})")
+    return df
@@ -0,0 +1,253 @@
+# trm_cloud/extractors.py
+# -*- coding: utf-8 -*-
+"""
+Ortak ürün kartı çıkarıcı kaydı (scrape_products.py ve scrape_site.py kullanır)
+------------------------------------------------------------------------------
+- Her site teması bir "profil": kart seçicileri + alan seçicileri + sonraki sayfa
+  seçicileri. Seçiciler bir kez soupsieve ile derlenir.
+- Kategori başına ilk sayfada profil otomatik seçilir (en çok eksiksiz kart
+  çıkaran profil) ve "state" sözlüğüne yazılır; sonraki sayfalarda bu profil
+  ve isabet eden kart seçicisi önce denenir.
+- Alan zincirleri her kartta baştan, öncelik sırasıyla denenir (ilk eşleşen
+  kazanır); kartlar arasında alan seçicisi önbelleğe alınmaz.
+- state düz bir dict'tir; süreç havuzuna gidip geri dönebilir.
+
+Çıkan ham kart: {"url", "name", "price", "sku", "image"} (url: ham href,
+price: ham metin). Mutlak URL / sayı dönüşümü çağıran scraper'a aittir.
+"""
+
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import soupsieve as sv
+
+from prices import PRICE_IN_TEXT_RE
+
+FIELDS = ("url", "name", "price", "sku", "image")
+
+
+class Field:
+    """
+    Bir alanın seçici zinciri.
+    get: text | href | sku | img ; require: boş değer dönerse zincire devam et
+    """
+
+    def __init__(self, selectors: List[str], get: str = "text", require: bool = False):
+        self.selectors = list(selectors)
+        self.compiled = [sv.compile(s) for s in self.selectors]
+        self.get = get
+        self.require = require
+
+
+class Profile:
+    def __init__(self, name: str, cards: List[str], fields: Dict[str, Field], next_links: List[str],
+                 next_needs_href: bool = True, price_re: Optional[Pattern] = None):
+        self.name = name
+        self.cards = [sv.compile(s) for s in cards]
+        self.fields = fields
+        self.next_links = [sv.compile(s) for s in next_links]
+        self.next_needs_href = next_needs_href
+        # fiyat seçicisi ıskalarsa kart metninde aranacak desen
+        self.price_re = price_re
+
+
+PROFILES: Dict[str, Profile] = {}
+
+
+def register(profile: Profile) -> Profile:
+    PROFILES[profile.name] = profile
+    return profile
+
+
+# -------------------------------
+# DEĞER OKUMA
+# -------------------------------
+def _text(el) -> str:
+    return " ".join(el.get_text(" ", strip=True).split())
+
+
+def _value(el, get: str) -> str:
+    if get == "href":
+        return (el.get("href") or "").strip()
+    if get == "img":
+        return el.get("data-src") or el.get("src") or ""
+    if get == "sku" and el.has_attr("data-sku"):
+        return el["data-sku"]
+    return _text(el)
+
+
+def _pick(card, field: Field) -> str:
+    # Zincir sırayla denenir, ilk eşleşen kazanır.
+    # Kartın kendisi de aday (ör. <a class="product-card" href=...>).
+    for sel in field.compiled:
+        el = card if sel.match(card) else sel.select_one(card)
+        if el is None:
+            continue
+        val = _value(el, field.get)
+        if field.require and not val:
+            continue
+        return val
+    return ""
+
+
+def extract_card(card, profile: Profile) -> Dict[str, str]:
+    """Kartın tüm alanlarını tek geçişte çıkarır."""
+    out = {}
+    for key in FIELDS:
+        field = profile.fields.get(key)
+        out[key] = _pick(card, field) if field is not None else ""
+    if not out["price"] and profile.price_re is not None:
+        m = profile.price_re.search(card.get_text(" ", strip=True))
+        if m:
+            out["price"] = m.group(0)
+    return out
+
+
+def find_cards(page, profile: Profile, first: Optional[int] = None) -> Tuple[list, Optional[int]]:
+    order = range(len(profile.cards))
+    if first is not None and first < len(profile.cards):
+        order = [first] + [i for i in order if i != first]
+    for i in order:
+        hits = profile.cards[i].select(page)
+        if hits:
+            return hits, i
+    return [], None
+
+
+def find_next(page, profile: Profile) -> Optional[str]:
+    """Sonraki sayfa linkinin href'i; link yoksa None (href'siz buton için "")."""
+    for sel in profile.next_links:
+        a = sel.select_one(page)
+        if a is None:
+            continue
+        href = (a.get("href") or "").strip()
+        if href or not profile.next_needs_href:
+            return href
+    return None
+
+
+# -------------------------------
+# PROFİL TESPİTİ + SAYFA ÇIKARMA
+# -------------------------------
+def detect(page, prefer: Optional[str] = None) -> Optional[Dict]:
+    """En çok eksiksiz (url + isim) kart çıkaran profili seçer; eşitlikte prefer kazanır."""
+    names = sorted(PROFILES, key=lambda n: n != prefer)
+    best, best_score = None, 0
+    for name in names:
+        profile = PROFILES[name]
+        cards, idx = find_cards(page, profile)
+        if not cards:
+            continue
+        score = 0
+        for c in cards:
+            it = extract_card(c, profile)
+            if it["url"] and it["name"]:
+                score += 1
+        if score > best_score:
+            best, best_score = {"profile": name, "card": idx}, score
+    return best
+
+
+def extract_page(page, state: Dict, prefer: Optional[str] = None) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    """
+    Sayfadaki ham kartlar ve sonraki sayfa href'i.
+    state kategori boyunca aynı dict olmalı; ilk çağrıda doldurulur.
+    """
+    profile = PROFILES.get(state.get("profile", ""))
+    cards = []
+    if profile is not None:
+        cards, idx = find_cards(page, profile, state.get("card"))
+        if idx is not None:
+            state["card"] = idx
+    if not cards:
+        # ilk sayfa ya da tema değişti: yeniden tespit
+        found = detect(page, prefer or state.get("profile"))
+        if found is None:
+            fallback = PROFILES.get(prefer or "") or profile
+            return [], (find_next(page, fallback) if fallback else None)
+        state.clear()
+        state.update(found)
+        profile = PROFILES[found["profile"]]
+        cards, _ = find_cards(page, profile, found["card"])
+
+    items = [extract_card(c, profile) for c in cards]
+    return items, find_next(page, profile)
+
+
+# -------------------------------
+# KAYITLI PROFİLLER
+# -------------------------------
+# scrape_products.py'nin tarihsel seçicileri
+PRODUCTS_SELECTORS = {
+    "product_card": [
+        ".product-card",
+        ".product-item",
+        "article.product",
+        "li.product",
+        "div.product",
+    ],
+    "title": [
+        ".product-title",
+        ".card-title",
+        "h2 a",
+        "h2.product-title a",
+        "h3 a",
+        "a.product-name",
+    ],
+    "price": [
+        ".price",
+        ".current-price",
+        ".product-price",
+        ".amount",
+        "span.woocommerce-Price-amount",
+    ],
+    "link": [
+        "a.product-link",
+        ".product-title a",
+        "a.card-link",
+        "a",
+    ],
+    "sku": [
+        "[data-sku]",
+        ".sku",
+        ".product-sku",
+    ],
+    "image": [
+        "img",
+    ],
+    "pagination_next": [
+        "a.next",
+        "a[rel='next']",
+        ".pagination .next a",
+    ],
+}
+
+register(Profile(
+    "trm_products",
+    cards=PRODUCTS_SELECTORS["product_card"],
+    fields={
+        "url": Field(PRODUCTS_SELECTORS["link"], "href"),
+        "name": Field(PRODUCTS_SELECTORS["title"]),
+        "price": Field(PRODUCTS_SELECTORS["price"]),
+        "sku": Field(PRODUCTS_SELECTORS["sku"], "sku"),
+        "image": Field(PRODUCTS_SELECTORS["image"], "img"),
+    },
+    next_links=PRODUCTS_SELECTORS["pagination_next"],
+))
+
+# scrape_site.py'nin tarihsel seçicileri (virgüllü seçiciler belge sırasıyla eşleşir)
+register(Profile(
+    "trm_site",
+    cards=[
+        ".product, .product-card, .productItem, .product-item, li.product, .col-product",
+        "a[href*='/urun-'], a[href*='/p-'], a[href*='/Product-']",
+    ],
+    fields={
+        "url": Field(["a[href]"], "href"),
+        "name": Field(["[itemprop='name']", ".product-name", ".name", "h3", "h2", "h4", "span"], require=True),
+        "price": Field([".price, .product-price, [itemprop='price'], .current, .new-price, .urunFiyat, .prc"]),
+        "image": Field(["img[src]"], "img"),
+    },
+    next_links=["a[rel='next'], .pagination a.next, .pages a.next, a[aria-label='Next']"],
+    next_needs_href=False,
+    price_re=PRICE_IN_TEXT_RE,
+))
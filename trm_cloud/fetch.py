@@ -0,0 +1,197 @@
+# trm_cloud/fetch.py
+# -*- coding: utf-8 -*-
+"""
+Ortak HTTP katmanı (scrape_products.py ve scrape_site.py kullanır)
+------------------------------------------------------------------
+- Tek requests.Session: keep-alive + bağlantı havuzu (her sayfada yeni TCP/TLS yok)
+- gzip/deflate şeffaf açılır; brotli paketi kuruluysa 'br' de istenir
+- 429/5xx ve bağlantı hatalarında sınırlı sayıda, jitter'lı üstel backoff ile tekrar
+- Host başına eşzamanlılık ve istekler arası minimum aralık (HostThrottle)
+- Koşu başına istek bütçesi (TRM_REQUEST_BUDGET, 0 = sınırsız)
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+try:  # urllib3, brotli/brotlicffi kuruluysa 'br' yanıtlarını kendisi açar
+    import brotli  # noqa: F401
+    _HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _HAS_BROTLI = True
+    except ImportError:
+        _HAS_BROTLI = False
+
+
+# -------------------------------
+# YAPILANDIRMA
+# -------------------------------
+TIMEOUT = 20
+RETRIES = int(os.getenv("TRM_RETRIES", "3") or "3")                  # ilk denemeye ek tekrar sayısı
+BACKOFF_BASE = float(os.getenv("TRM_BACKOFF_BASE", "1.0") or "1.0")  # sn
+BACKOFF_MAX = float(os.getenv("TRM_BACKOFF_MAX", "30") or "30")     # sn
+REQUEST_BUDGET = int(os.getenv("TRM_REQUEST_BUDGET", "0") or "0")    # 0 = sınırsız
+PER_HOST = int(os.getenv("TRM_PER_HOST", "2") or "2")                # host başına eşzamanlı istek
+HOST_INTERVAL = float(os.getenv("TRM_HOST_INTERVAL", "0.8") or "0.8")  # aynı host'a iki istek arası min. (sn)
+POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Encoding": "gzip, deflate, br" if _HAS_BROTLI else "gzip, deflate",
+}
+
+
+class FetchError(Exception):
+    """Tekrarlar tükendikten sonra hâlâ başarısız olan istek."""
+
+
+class BudgetExhausted(FetchError):
+    """Koşu başına istek bütçesi doldu."""
+
+
+# -------------------------------
+# HOST BAŞINA NEZAKET SINIRI
+# -------------------------------
+class HostThrottle:
+    """Host başına eşzamanlı istek sayısını ve istekler arası aralığı sınırlar."""
+
+    def __init__(self, per_host: int, min_interval: float):
+        self.per_host = max(1, per_host)
+        self.min_interval = max(0.0, min_interval)
+        self._lock = threading.Lock()
+        self._sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_at: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self.per_host)
+        sem.acquire()
+        try:
+            # sıradaki istek zamanını kilit altında ayır, beklemeyi kilit dışında yap
+            with self._lock:
+                now = time.monotonic()
+                at = max(now, self._next_at.get(host, 0.0))
+                self._next_at[host] = at + self.min_interval
+            if at > now:
+                time.sleep(at - now)
+            yield
+        finally:
+            sem.release()
+
+
+THROTTLE = HostThrottle(PER_HOST, HOST_INTERVAL)
+
+
+# -------------------------------
+# OTURUM + SAYAÇLAR
+# -------------------------------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "retries": 0, "errors": 0}
+
+
+def session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update(DEFAULT_HEADERS)
+            _session = s
+        return _session
+
+
+def take_budget():
+    with _stats_lock:
+        if REQUEST_BUDGET and _stats["requests"] >= REQUEST_BUDGET:
+            raise BudgetExhausted(f"istek bütçesi doldu ({REQUEST_BUDGET})")
+        _stats["requests"] += 1
+
+
+def count(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    # Retry-After (sn) varsa ona uy; yoksa "full jitter" üstel bekleme
+    if retry_after and retry_after.strip().isdigit():
+        return min(BACKOFF_MAX, float(retry_after))
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = TIMEOUT,
+        ok_statuses=(200,), stream: bool = False) -> requests.Response:
+    """
+    GET isteği; 429/5xx ve ağ hatalarında RETRIES kez tekrar eder.
+    Başarısız olursa FetchError, bütçe dolarsa BudgetExhausted fırlatır.
+    stream=True: gövde indirilmez (r.raw'dan okunur, iş bitince r.close()).
+    """
+    last_err = ""
+    for attempt in range(RETRIES + 1):
+        take_budget()
+        retry_after = None
+        try:
+            with THROTTLE.slot(url):
+                r = session().get(url, headers=headers, timeout=timeout, stream=stream)
+            if r.status_code in ok_statuses:
+                return r
+            r.close()
+            last_err = f"HTTP {r.status_code}"
+            if r.status_code not in RETRY_STATUSES:
+                break
+            retry_after = r.headers.get("Retry-After")
+        except requests.RequestException as e:
+            last_err = str(e)
+
+        if attempt < RETRIES:
+            count("retries")
+            time.sleep(backoff_delay(attempt, retry_after))
+
+    count("errors")
+    raise FetchError(f"{url}: {last_err}")
+
+
+def get_soup(url: str, parser: str = "html.parser",
+             headers: Optional[Dict[str, str]] = None, timeout: float = TIMEOUT) -> BeautifulSoup:
+    return soup_from(get(url, headers=headers, timeout=timeout), parser)
+
+
+def declared_encoding(r: requests.Response) -> Optional[str]:
+    # Sunucu charset bildirmediyse None; BeautifulSoup <meta charset>'a bakar
+    if "charset" in r.headers.get("Content-Type", "").lower():
+        return r.encoding
+    return None
+
+
+def soup_from(r: requests.Response, parser: str = "html.parser") -> BeautifulSoup:
+    return BeautifulSoup(r.content, parser, from_encoding=declared_encoding(r))
+
+
+def summary() -> str:
+    with _stats_lock:
+        s = dict(_stats)
+    budget = f"/{REQUEST_BUDGET}" if REQUEST_BUDGET else ""
+    return f"[HTTP] istek: {s['requests']}{budget} | tekrar: {s['retries']} | hata: {s['errors']}"
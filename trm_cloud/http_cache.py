@@ -0,0 +1,126 @@
+# trm_cloud/http_cache.py
+# -*- coding: utf-8 -*-
+"""
+Kalıcı HTTP yanıt önbelleği (kategori sayfaları için)
+-----------------------------------------------------
+- Anahtar: sayfa URL'i
+- Saklanan: ETag / Last-Modified + o sayfadan son çıkarılan ürünler ve sonraki sayfa linki
+- Sonraki koşuda If-None-Match / If-Modified-Since gönderilir; 304 gelirse sayfa
+  hiç parse edilmeden saklanan ürünler kullanılır.
+- Boyut sınırlı: en eski kullanılan kayıtlar (LRU) TRM_CACHE_MAX_ENTRIES /
+  TRM_CACHE_MAX_BYTES aşılınca atılır.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+MAX_ENTRIES = int(os.getenv("TRM_CACHE_MAX_ENTRIES", "2000") or "2000")
+MAX_BYTES = int(os.getenv("TRM_CACHE_MAX_BYTES", str(20 * 1024 * 1024)) or "0")
+
+
+class HttpCache:
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._bytes = 0
+        self._load()
+
+    # ---- kalıcılık ----
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[CACHE] {self.path} okunamadı, boş başlanıyor: {e}")
+            return
+        # dosyadaki sıra = LRU sırası (en eski başta)
+        for url, entry in data.get("entries", {}).items():
+            self._entries[url] = entry
+            self._bytes += entry.get("size", 0)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._evict()
+            payload = {"saved_at": int(time.time()), "entries": self._entries}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+    # ---- kullanım ----
+    def validators(self, url: str) -> Dict[str, str]:
+        """Koşullu istek başlıkları (kayıt yoksa boş)."""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+        hdrs = {}
+        if entry.get("etag"):
+            hdrs["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            hdrs["If-Modified-Since"] = entry["last_modified"]
+        return hdrs
+
+    def hit(self, url: str) -> Optional[Dict]:
+        """304 geldiğinde çağrılır; saklanan ürünleri ve sonraki linki döndürür."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            self._entries.move_to_end(url)
+            entry["used"] = int(time.time())
+            self.hits += 1
+            return entry
+
+    def store(self, url: str, headers, rows: List[Dict], next_url: Optional[str]):
+        """200 yanıtından sonra çağrılır; doğrulayıcı yoksa saklamaya değmez."""
+        etag = headers.get("ETag", "")
+        last_modified = headers.get("Last-Modified", "")
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(url, None)
+            if old:
+                self._bytes -= old.get("size", 0)
+            if not etag and not last_modified:
+                return
+            entry = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "rows": rows,
+                "next": next_url or "",
+                "used": int(time.time()),
+            }
+            entry["size"] = len(json.dumps(entry, ensure_ascii=False))
+            self._entries[url] = entry
+            self._bytes += entry["size"]
+            self._evict()
+
+    def _evict(self):
+        # kilit altında çağrılır
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.get("size", 0)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return (
+            f"[CACHE] isabet (304): {self.hits} | ıska: {self.misses} | oran: %{rate:.0f} | "
+            f"kayıt: {len(self._entries)} | boyut: {self._bytes / 1024:.0f} KB"
+        )
@@ -1,45 +1,120 @@
 # trm_cloud/link_builder.py
+# -*- coding: utf-8 -*-
+"""
+UTM link üretici
+----------------
+- Ürün listesi parça parça (LINK_CHUNK satır) okunur ve yazılır; bellek sabit.
+  Kodlama / ayraç dosyadan tespit edilir (Excel CSV: utf-8-sig + ';', düz: ',').
+- Tek geçişte kanal/ortam/kampanya matrisinin tüm kombinasyonları üretilir:
+    UTM_MATRIX="telegram:bot:trm, instagram:story:trm"   (varsayılan: telegram:bot:trm)
+- Ürün adı satır başına bir kez encode edilir (ve lru_cache ile tekrarlarda
+  hiç edilmez); UTM kuyrukları kombinasyon başına bir kez hazırlanır.
+
+Koşum:
+    python trm_cloud/link_builder.py
+"""
+
+import os
 import urllib.parse
 import csv
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Optional
+
+import report_writer
 
 INPUT = Path("trm_reports/TRM_PRODUCTS.csv")   # scrape.py’nin ürettiği ürün listesi
 OUTPUT = Path("trm_reports/TRM_UTM_LINKS.csv")
+BASE = "https://trendurunlermarket.com/?s="
+MATRIX_RAW = os.getenv("UTM_MATRIX", "telegram:bot:trm")
+CHUNK = int(os.getenv("LINK_CHUNK", "10000") or "10000")
+FIELDS = ["name", "price", "utm_source", "utm_medium", "utm_campaign", "utm_link"]
 
-def build_link(name: str, kanal="telegram", platform="bot"):
-    # Ürün adını URL-encode yap
-    q = urllib.parse.quote_plus(name)
-    # UTM linkini oluştur
-    return f"https://trendurunlermarket.com/?s={q}&utm_source={kanal}&utm_medium={platform}&utm_campaign=trm"
 
-def main():
-    if not INPUT.exists():
-        print("Ürün listesi bulunamadı:", INPUT)
-        return
+@lru_cache(maxsize=1 << 16)
+def encode_name(name: str) -> str:
+    return urllib.parse.quote_plus(name)
+
+
+def utm_suffix(kanal: str, platform: str, campaign: str = "trm") -> str:
+    q = urllib.parse.quote_plus
+    return f"&utm_source={q(kanal)}&utm_medium={q(platform)}&utm_campaign={q(campaign)}"
+
+
+def build_link(name: str, kanal="telegram", platform="bot", campaign="trm"):
+    # Ürün adını URL-encode yap + UTM kuyruğu
+    return BASE + encode_name(name) + utm_suffix(kanal, platform, campaign)
+
+
+def parse_matrix(raw: str = MATRIX_RAW):
+    """'kanal:ortam[:kampanya]' girdileri (virgül/satır ayrımlı) → [(kanal, ortam, kampanya)]."""
+    combos = []
+    for part in raw.replace(",", "\n").splitlines():
+        bits = [b.strip() for b in part.split(":")]
+        if not bits[0]:
+            continue
+        kanal = bits[0]
+        platform = bits[1] if len(bits) > 1 and bits[1] else "bot"
+        campaign = bits[2] if len(bits) > 2 and bits[2] else "trm"
+        combos.append((kanal, platform, campaign))
+    return list(dict.fromkeys(combos)) or [("telegram", "bot", "trm")]
 
-    with INPUT.open(encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
 
-    out_rows = []
+def iter_link_rows(rows, combos, name_col: int = 0, price_col: int = 1):
+    """Ürün satırları (liste) → (name, price, kaynak, ortam, kampanya, link) demetleri."""
+    tails = [(k, p, c, utm_suffix(k, p, c)) for k, p, c in combos]
+    need = max(name_col, price_col if price_col is not None else 0)
     for r in rows:
-        name = r.get("name", "").strip()
+        if len(r) <= need:
+            r = r + [""] * (need + 1 - len(r))
+        name = r[name_col].strip()
         if not name:
             continue
-        link = build_link(name, kanal="telegram", platform="bot")
-        out_rows.append({
-            "name": name,
-            "price": r.get("price",""),
-            "utm_link": link
-        })
-
-    OUTPUT.parent.mkdir(exist_ok=True)
-    with OUTPUT.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["name","price","utm_link"])
-        writer.writeheader()
-        for row in out_rows:
-            writer.writerow(row)
-
-    print(f"OK | {len(out_rows)} ürün için UTM linki üretildi → {OUTPUT}")
+        price = r[price_col] if price_col is not None else ""
+        head = BASE + encode_name(name)
+        for k, p, c, tail in tails:
+            yield (name, price, k, p, c, head + tail)
+
+
+def build_links(src: Path, dst: Path, combos, chunk: int = CHUNK) -> Optional[int]:
+    """
+    src'yi parça parça okuyup dst'ye yazar; üretilen link sayısını döner.
+    src'de "name" sütunu yoksa uyarı basar, dst'ye dokunmaz ve None döner.
+    """
+    enc, sep = report_writer.sniff(str(src))
+    n = 0
+    with src.open(encoding=enc, newline="") as fin:
+        reader = csv.reader(fin, delimiter=sep)
+        header = [h.strip() for h in next(reader, [])]
+        if "name" not in header:
+            print(f"[LINK] {src}: 'name' sütunu yok (sütunlar: {', '.join(header) or '-'}), link üretilmedi.")
+            return None
+        price_col = header.index("price") if "price" in header else None
+        dst.parent.mkdir(exist_ok=True, parents=True)
+        with dst.open("w", newline="", encoding="utf-8") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(FIELDS)
+            links = iter_link_rows(reader, combos, header.index("name"), price_col)
+            while True:
+                block = list(islice(links, chunk))
+                if not block:
+                    break
+                writer.writerows(block)
+                n += len(block)
+    return n
+
+
+def main():
+    if not INPUT.exists():
+        print("Ürün listesi bulunamadı:", INPUT)
+        return
+
+    combos = parse_matrix()
+    n = build_links(INPUT, OUTPUT, combos)
+    if n is None:
+        return
+    print(f"OK | {n} UTM linki ({len(combos)} kombinasyon) üretildi → {OUTPUT}")
 
 if __name__ == "__main__":
     main()
@@ -3,8 +3,15 @@ from pathlib import Path
 
 import pandas as pd
 
+import commissions
+import prices
+import report_writer
+from sku_index import SkuIndex, fill_skus
+
 PROD_CSV = Path("TRM_PRODUCTS.csv")
 REPORT_CSV = Path("TRM_REPORT_PRETTY.csv")
+SKU_DB = Path("TRM_SKU_INDEX.sqlite")  # kanonik URL → kalıcı SKU
+DEFAULT_COMMISSION = 0.18
 
 DEFAULT_ROWS = [
     {"name": "Acer X A", "price": 199.90, "url": "https://example.com/a"},
@@ -16,24 +23,13 @@ DEFAULT_ROWS = [
 
 def read_products() -> pd.DataFrame:
     if PROD_CSV.exists():
-        df = pd.read_csv(PROD_CSV)
+        # scrape_products ';' + utf-8-sig yazar; kodlama/ayraç tespit edilir
+        df = report_writer.read_table(PROD_CSV)
     else:
         df = pd.DataFrame(DEFAULT_ROWS)
 
-    # fiyatı normalize et
-    def norm_price(v):
-        if pd.isna(v):
-            return None
-        if isinstance(v, (int, float)):
-            return float(v)
-        s = str(v).lower().replace("tl", "").replace("₺", "").strip()
-        s = s.replace(".", "").replace(",", ".")
-        try:
-            return float(s)
-        except Exception:
-            return None
-
-    df["price"] = df["price"].apply(norm_price)
+    # fiyatı normalize et (ortak kurallar: prices.py, sütun bazında)
+    df["price"] = prices.parse_price_series(df["price"])
     return df
 
 def main():
@@ -42,14 +38,19 @@ def main():
     if "name" not in df.columns:
         df["name"] = ""
 
-    df["commission"] = 18.0
-    df["estimated_commission_try"] = (df["price"].fillna(0) * df["commission"] / 100).round(2)
+    # oran: commission_rates.csv (kategori yoksa/bulunmazsa DEFAULT_COMMISSION), yüzde olarak
+    rate = commissions.rates_for(df.get("source_category"), commissions.load_rates(), DEFAULT_COMMISSION, df.index)
+    df["commission"] = (rate * 100).round(2)
+    df["estimated_commission_try"] = (df["price"].fillna(0) * rate).round(2)
 
-    # sku üret
+    # boş sku'lar kalıcı indeksten (aynı ürün her koşuda aynı SKU)
     df = df.reset_index(drop=True)
-    df["sku"] = df.index.map(lambda i: f"SKU-{chr(65 + (i % 26))}")
+    with SkuIndex(str(SKU_DB)) as idx:
+        df["sku"] = fill_skus(df, idx)
 
-    out = df[["sku", "name", "price", "commission", "estimated_commission_try"]]
+    # url / image varsa taşınır (Telegram mesajı ve albüm gönderimi için)
+    out = df[["sku", "name", "price", "commission", "estimated_commission_try"]
+             + [c for c in ("url", "image") if c in df.columns]]
     out.to_csv(REPORT_CSV, index=False, encoding="utf-8")
     print("RAPOR:", REPORT_CSV.name, "hazır.")
 
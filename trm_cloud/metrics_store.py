@@ -0,0 +1,126 @@
+# trm_cloud/metrics_store.py
+# -*- coding: utf-8 -*-
+"""
+Mesaj etkileşim anlık görüntüleri (SQLite, WAL, yalnızca ekleme)
+----------------------------------------------------------------
+- Tablo: metrics(source, msg_id, ts, views, forwards, replies); birincil anahtar
+  (source, msg_id, ts) aynı zamanda sorgu indeksidir. Her çekimde mesaj başına
+  bir satır eklenir; eskisi silinmez, böylece zaman içindeki değişim görülür.
+- top_by_views: son N günde gönderilmiş ürünleri, mesajlarının en son
+  görüntüsündeki izlenmelere göre sıralar. SKU'lar post_store'daki
+  (target, message_id) ile eşlenir.
+
+Koşum:
+    python trm_cloud/metrics_store.py top [gün] [adet]
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import post_store
+
+DB_PATH = os.getenv("TELEGRAM_METRICS_DB", os.path.join("trm_reports", "TELEGRAM_METRICS.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    source   TEXT NOT NULL,
+    msg_id   INTEGER NOT NULL,
+    ts       INTEGER NOT NULL,
+    views    INTEGER,
+    forwards INTEGER,
+    replies  INTEGER,
+    PRIMARY KEY (source, msg_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+def _int(v) -> Optional[int]:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class MetricsStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    def record(self, source: str, rows: Iterable[Dict], ts: Optional[int] = None) -> int:
+        """tg_pull satırlarından (id, views, forwards, replies) tek zaman damgalı görüntü."""
+        ts = ts or int(time.time())
+        with self.db:
+            cur = self.db.executemany(
+                "INSERT OR REPLACE INTO metrics (source, msg_id, ts, views, forwards, replies) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((source, int(r["id"]), ts, _int(r.get("views")), _int(r.get("forwards")),
+                  _int(r.get("replies"))) for r in rows),
+            )
+        return cur.rowcount
+
+    def history(self, source: str, msg_id: int) -> List[tuple]:
+        return self.db.execute(
+            "SELECT ts, views, forwards, replies FROM metrics WHERE source = ? AND msg_id = ? ORDER BY ts",
+            (source, msg_id),
+        ).fetchall()
+
+    def top_by_views(self, days: int = 7, limit: int = 20, post_db: str = post_store.DB_PATH) -> List[Dict]:
+        """Son `days` günde gönderilen ürünler, hedeflerdeki son izlenme toplamına göre."""
+        if not os.path.exists(post_db):
+            return []
+        cutoff = int(time.time()) - days * 86400
+        self.db.execute("ATTACH DATABASE ? AS p", (post_db,))
+        try:
+            # önce pencere (posts_ts indeksi; yoksa planlayıcı tüm posts tablosunu tarar),
+            # sonra her gönderinin son görüntüsü birincil anahtar (source, msg_id, ts) üzerinden
+            rows = self.db.execute(
+                """
+                SELECT pp.sku, MAX(pp.name), MAX(pp.url),
+                       SUM(m.views), SUM(m.forwards), SUM(m.replies)
+                FROM p.posts AS pp INDEXED BY posts_ts
+                JOIN metrics AS m
+                  ON m.source = pp.target AND m.msg_id = pp.message_id
+                 AND m.ts = (SELECT MAX(ts) FROM metrics
+                             WHERE source = pp.target AND msg_id = pp.message_id)
+                WHERE pp.ts >= ? AND pp.message_id IS NOT NULL
+                GROUP BY pp.sku
+                ORDER BY SUM(m.views) DESC
+                LIMIT ?
+                """,
+                (cutoff, limit),
+            ).fetchall()
+        finally:
+            self.db.execute("DETACH DATABASE p")
+        keys = ("sku", "name", "url", "views", "forwards", "replies")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv):
+    cmd = argv[0] if argv else "top"
+    if cmd != "top":
+        print("Kullanım: python trm_cloud/metrics_store.py top [gün] [adet]")
+        return
+    days = int(argv[1]) if len(argv) > 1 else 7
+    limit = int(argv[2]) if len(argv) > 2 else 20
+    with MetricsStore() as store:
+        for r in store.top_by_views(days, limit):
+            print(f"{r['views'] or 0:>8} izlenme | {r['sku']} | {r['name']} | {r['url']}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
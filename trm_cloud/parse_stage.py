@@ -0,0 +1,79 @@
+# trm_cloud/parse_stage.py
+# -*- coding: utf-8 -*-
+"""
+Fetch'ten ayrık HTML parse aşaması
+----------------------------------
+- Sayfa baytları ProcessPoolExecutor'a gönderilir; parse birden çok çekirdekte
+  koşar (html.parser / lxml CPU'ya bağlı ve GIL yüzünden thread'le ölçeklenmez).
+- Kuyruk sınırlı: aynı anda en fazla max_pending sayfa bekler; dolunca submit()
+  bloklanır ve fetch tarafı yavaşlar (backpressure).
+- Parser seçimi: TRM_PARSER=html.parser | lxml (lxml yoksa html.parser'a düşülür)
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+PARSE_PROCS = int(os.getenv("TRM_PARSE_PROCS", "0") or "0")  # 0 = parse fetch thread'inde yapılır
+QUEUE_SIZE = int(os.getenv("TRM_PARSE_QUEUE", "0") or "0")   # 0 = 2 x PARSE_PROCS
+
+
+def resolve_parser(name: str) -> str:
+    name = (name or "html.parser").strip()
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("[PARSE] lxml kurulu değil, html.parser kullanılıyor.")
+            return "html.parser"
+    return name
+
+
+PARSER = resolve_parser(os.getenv("TRM_PARSER", "html.parser"))
+
+
+def _parse_job(content: bytes, url: str, parser: str, encoding: Optional[str],
+               state: Optional[Dict]) -> Tuple[List[Dict], Optional[str], Dict]:
+    # işçi süreçte çalışır; döngüsel import olmasın diye burada içe aktarılır
+    from scrape_products import parse_html
+    return parse_html(content, url, parser, encoding, state)
+
+
+class ParseStage:
+    def __init__(self, workers: int = PARSE_PROCS, max_pending: int = QUEUE_SIZE,
+                 parser: str = PARSER):
+        self.workers = max(1, workers or (os.cpu_count() or 1))
+        self.parser = parser
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * self.workers)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.pages = 0
+
+    def submit(self, content: bytes, url: str, encoding: Optional[str] = None,
+               state: Optional[Dict] = None) -> Future:
+        """
+        Kuyruk doluysa yer açılana kadar bekler. Sonuç: (kartlar, sonraki, state);
+        state (extractors profil önbelleği) süreçte güncellenip kopya olarak döner.
+        """
+        self._slots.acquire()
+        try:
+            fut = self._pool.submit(_parse_job, content, url, self.parser, encoding, state)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _f: self._slots.release())
+        self.pages += 1
+        return fut
+
+    def parse(self, content: bytes, url: str, encoding: Optional[str] = None,
+              state: Optional[Dict] = None):
+        return self.submit(content, url, encoding, state).result()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,187 @@
+# trm_cloud/post_store.py
+# -*- coding: utf-8 -*-
+"""
+Gönderilen ürünlerin kalıcı, indeksli deposu (SQLite, WAL)
+---------------------------------------------------------
+- Tek tablo: posts(sku, target, url, name, message_id, ts); birincil anahtar
+  (sku, target). "Bu SKU gönderildi mi?" sorgusu birincil anahtarın ön ekiyle
+  indeksten yanıtlanır; log milyonlarca satıra çıksa da dosya taranmaz.
+- message_id NULL: mesaj yeniden deneme kuyruğunda (ürün yine "alınmış" sayılır).
+  Kuyruktan düşülen iş release ile silinir; ürün sonraki koşuda yeniden seçilir.
+- Eski TELEGRAM_POST_LOG.csv ilk açılışta bir kez içe aktarılır (hedef "").
+- Sıkıştırma (compact): yalnızca WAL checkpoint + VACUUM; kayıt silinmez.
+- Budama (prune GÜN): GÜN'den eski kayıtları siler. DİKKAT: silinen SKU'lar
+  "gönderilmemiş" sayılır ve raporda hâlâ varsa yeniden paylaşılır.
+- Dosya repo kökünde (TRM_* durum dosyalarıyla birlikte; CI önbelleğinde).
+
+Koşum (bakım):
+    python trm_cloud/post_store.py stats
+    python trm_cloud/post_store.py migrate [log.csv]
+    python trm_cloud/post_store.py compact
+    python trm_cloud/post_store.py prune GÜN     # eski SKU'lar yeniden paylaşılabilir!
+"""
+
+import csv
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterable, Optional, Set, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("TELEGRAM_POST_DB", os.path.join(ROOT, "TELEGRAM_POSTS.sqlite"))
+# eski post_telegram CSV logu repo'nun bir üst klasörüne yazıyordu
+LEGACY_LOG = os.path.join(ROOT, "..", "TELEGRAM_POST_LOG.csv")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    sku        TEXT NOT NULL,
+    target     TEXT NOT NULL DEFAULT '',
+    url        TEXT NOT NULL DEFAULT '',
+    name       TEXT NOT NULL DEFAULT '',
+    message_id INTEGER,
+    ts         INTEGER NOT NULL,
+    PRIMARY KEY (sku, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS posts_url ON posts (url);
+CREATE INDEX IF NOT EXISTS posts_ts ON posts (ts);
+CREATE INDEX IF NOT EXISTS posts_msg ON posts (target, message_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_IN_CHUNK = 500  # SQLite değişken sınırının altında
+
+
+class PostStore:
+    def __init__(self, path: str = DB_PATH, legacy_log: Optional[str] = LEGACY_LOG):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        if legacy_log and os.path.exists(legacy_log) and not self._meta("migrated_csv"):
+            n = self.migrate_csv(legacy_log)
+            print(f"[STORE] {legacy_log} içe aktarıldı: {n} SKU")
+
+    # ---- meta ----
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ---- sorgu ----
+    def __contains__(self, sku: str) -> bool:
+        return self.db.execute("SELECT 1 FROM posts WHERE sku = ? LIMIT 1", (sku,)).fetchone() is not None
+
+    def has_url(self, url: str) -> bool:
+        return self.db.execute("SELECT 1 FROM posts WHERE url = ? LIMIT 1", (url,)).fetchone() is not None
+
+    def posted(self, skus: Iterable[str]) -> Set[str]:
+        """Verilen SKU'lardan gönderilmiş olanlar (toplu indeks sorgusu)."""
+        skus = list(dict.fromkeys(skus))
+        found: Set[str] = set()
+        for i in range(0, len(skus), _IN_CHUNK):
+            chunk = skus[i:i + _IN_CHUNK]
+            q = "SELECT DISTINCT sku FROM posts WHERE sku IN (%s)" % ",".join("?" * len(chunk))
+            found.update(r[0] for r in self.db.execute(q, chunk))
+        return found
+
+    def pending(self) -> Set[Tuple[str, str]]:
+        """Kuyrukta bekleyen (message_id NULL) (sku, target) çiftleri; eski CSV kayıtları hariç."""
+        return set(self.db.execute("SELECT sku, target FROM posts WHERE message_id IS NULL AND target != ''"))
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    # ---- yazma ----
+    def record(self, sku: str, target: str = "", url: str = "", name: str = "",
+               message_id: Optional[int] = None, ts: Optional[int] = None):
+        """(sku, target) kaydı ekler; varsa message_id yalnızca yeni değer doluysa güncellenir."""
+        with self.db:
+            self.db.execute(
+                "INSERT INTO posts (sku, target, url, name, message_id, ts) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (sku, target) DO UPDATE SET "
+                "message_id = COALESCE(excluded.message_id, posts.message_id), ts = excluded.ts",
+                (sku, target or "", url or "", name or "", message_id, ts or int(time.time())),
+            )
+
+    def release(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Gönderilemeyen (sku, target) kayıtlarını siler; gönderilmiş (message_id dolu) kayda dokunmaz."""
+        with self.db:
+            return self.db.executemany(
+                "DELETE FROM posts WHERE sku = ? AND target = ? AND message_id IS NULL", list(pairs)
+            ).rowcount
+
+    def migrate_csv(self, path: str) -> int:
+        """Eski sku,name log'unu içe aktarır (target ""); tekrar çalıştırmak güvenli."""
+        ts = int(os.path.getmtime(path))
+        with open(path, "r", encoding="utf-8") as f, self.db:
+            rows = (
+                ((r.get("sku") or "").strip(), (r.get("name") or "").strip(), ts)
+                for r in csv.DictReader(f)
+            )
+            cur = self.db.executemany(
+                "INSERT OR IGNORE INTO posts (sku, name, ts) VALUES (?, ?, ?)",
+                (r for r in rows if r[0]),
+            )
+            self._set_meta("migrated_csv", str(int(time.time())))
+        return cur.rowcount
+
+    # ---- bakım ----
+    def compact(self):
+        """WAL'ı boşaltıp dosyayı küçültür; kayıtlara dokunmaz."""
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.db.execute("VACUUM")
+
+    def prune(self, keep_days: int) -> int:
+        """
+        keep_days'ten eski kayıtları siler. Silinen SKU'lar artık gönderilmiş
+        sayılmaz: raporda hâlâ varsa sonraki koşuda yeniden paylaşılır.
+        """
+        if keep_days <= 0:
+            return 0
+        cutoff = int(time.time()) - keep_days * 86400
+        with self.db:
+            return self.db.execute("DELETE FROM posts WHERE ts < ?", (cutoff,)).rowcount
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv):
+    cmd = argv[0] if argv else "stats"
+    if cmd == "migrate":
+        with PostStore(legacy_log=None) as store:
+            path = argv[1] if len(argv) > 1 else LEGACY_LOG
+            print(f"[STORE] {path}: {store.migrate_csv(path)} yeni SKU içe aktarıldı")
+    elif cmd == "compact":
+        with PostStore() as store:
+            store.compact()
+            print(f"[STORE] {store.path} sıkıştırıldı, {len(store)} kayıt")
+    elif cmd == "prune":
+        if len(argv) < 2 or int(argv[1]) <= 0:
+            print("Kullanım: post_store.py prune GÜN  (GÜN'den eski kayıtlar silinir; "
+                  "bu SKU'lar raporda hâlâ varsa YENİDEN PAYLAŞILIR)")
+            return
+        with PostStore() as store:
+            n = store.prune(int(argv[1]))
+            store.compact()
+            print(f"[STORE] {n} eski kayıt silindi (bu SKU'lar yeniden paylaşılabilir), {len(store)} kayıt kaldı")
+    else:
+        with PostStore() as store:
+            print(f"[STORE] {store.path}: {len(store)} kayıt")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
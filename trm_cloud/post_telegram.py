@@ -1,130 +1,353 @@
 # trm_cloud/post_telegram.py
 import os
 import csv
+import json
+import heapq
 import asyncio
-import pandas as pd
-from telethon import TelegramClient
+from itertools import islice
+from urllib.parse import urlparse
+from telethon import TelegramClient, utils
 from telethon.sessions import StringSession
-from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import UploadMediaRequest
+from telethon.tl.types import InputMediaUploadedPhoto, InputPeerChannel, InputPeerChat, InputPeerSelf, InputPeerUser
+
+import fetch
+from post_store import PostStore
+from prices import parse_price
+from tg_sources import load_sources
+from tg_send import ALBUM_MAX, CAPTION_MAX, SendScheduler, job_skus, load_queue, save_queue
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PRETTY_CSV = os.path.join(ROOT, "..", "TRM_REPORT_PRETTY.csv")
-LOG_CSV = os.path.join(ROOT, "..", "TELEGRAM_POST_LOG.csv")
+PRETTY_CSV = os.path.join(ROOT, "TRM_REPORT_PRETTY.csv")               # scrape_products çıktısı
+ENTITY_CACHE = os.path.join(ROOT, "TELEGRAM_ENTITY_CACHE.json")        # hedef → input peer
+RETRY_QUEUE = os.path.join(ROOT, "TELEGRAM_RETRY_QUEUE.jsonl")         # gönderilemeyen mesajlar
+DELTA_CSV = os.path.join(ROOT, "TRM_DELTA.csv")                        # yalnızca değişenler
 
 API_ID = int(os.getenv("TELEGRAM_API_ID", "0") or "0")
 API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 SESSION = os.getenv("TELEGRAM_SESSION", "")
-SOURCES_RAW = os.getenv("TELEGRAM_SOURCE", "")  # çoklu satır destekli
 BATCH = int(os.getenv("TELEGRAM_BATCH", "20") or "20")
+PRIORITY = os.getenv("TELEGRAM_PRIORITY", "").strip().lower()  # "" (dosya sırası) | commission | price_change
+ALBUM = os.getenv("TELEGRAM_ALBUM", "0") == "1"  # görselli ürünler 10'arlı albüm olarak gider
+USE_DELTA = os.getenv("TELEGRAM_USE_DELTA", "0") == "1"  # tüm rapor yerine yalnızca yeni / fiyatı düşenler
+DELTA_CHANGES = ("new", "price_drop")
+
+# -------------------------------
+# HEDEF (ENTITY) ÖNBELLEĞİ
+# -------------------------------
+_PEER_TYPES = {"channel": InputPeerChannel, "chat": InputPeerChat, "user": InputPeerUser}
+
+
+def _peer_to_json(peer):
+    if isinstance(peer, InputPeerChannel):
+        return {"type": "channel", "id": peer.channel_id, "access_hash": peer.access_hash}
+    if isinstance(peer, InputPeerChat):
+        return {"type": "chat", "id": peer.chat_id}
+    if isinstance(peer, InputPeerUser):
+        return {"type": "user", "id": peer.user_id, "access_hash": peer.access_hash}
+    return None
+
+
+def _peer_from_json(d):
+    cls = _PEER_TYPES.get(d.get("type"))
+    if cls is InputPeerChat:
+        return cls(d["id"])
+    if cls is not None:
+        return cls(d["id"], d["access_hash"])
+    return None
 
-def load_sources():
-    if not SOURCES_RAW.strip():
-        return []
-    # newline, virgül ve boşluk ayırıcı
-    parts = []
-    for ln in SOURCES_RAW.replace(",", "\n").splitlines():
-        s = ln.strip()
-        if not s:
+
+def load_entity_cache():
+    if not os.path.exists(ENTITY_CACHE):
+        return {}
+    try:
+        with open(ENTITY_CACHE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_entity_cache(cache):
+    tmp = ENTITY_CACHE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, ENTITY_CACHE)
+
+
+async def resolve_targets(client, sources, refresh=()):
+    """
+    Her hedef koşu başına bir kez çözülür; sonuç diske yazılır ve sonraki
+    koşularda get_entity çağrısı yapılmaz. refresh: önbelleği bayat olanlar.
+    """
+    cache = load_entity_cache()
+    peers = {}
+    changed = False
+    for target in sources:
+        if target in cache and target not in refresh:
+            peer = _peer_from_json(cache[target])
+            if peer is not None:
+                peers[target] = peer
+                continue
+        try:
+            peer = utils.get_input_peer(await client.get_entity(target))
+        except Exception as ex:
+            print(f"[TG] '{target}' çözülemedi: {ex}")
             continue
-        # t.me/ links → @handle
-        if "t.me/" in s and not s.startswith("@"):
-            s = s.split("t.me/")[-1].strip("/")
-            if not s.startswith("@"):
-                s = f"@{s}"
-        parts.append(s)
-    return parts
-
-def load_log():
-    posted = set()
-    if os.path.exists(LOG_CSV):
-        with open(LOG_CSV, "r", encoding="utf-8") as f:
-            r = csv.DictReader(f)
-            for row in r:
-                posted.add(row.get("sku","").strip())
-    return posted
-
-def append_log(rows):
-    exists = os.path.exists(LOG_CSV)
-    with open(LOG_CSV, "a", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=["sku","name"])
-        if not exists:
-            w.writeheader()
-        for r in rows:
-            w.writerow({"sku": r.get("sku",""), "name": r.get("name","")})
+        peers[target] = peer
+        d = _peer_to_json(peer)
+        if d is not None:
+            cache[target] = d
+            changed = True
+    if changed:
+        save_entity_cache(cache)
+    return peers
+
+
+def build_message(row):
+    name = row.get("name","").strip()
+    price = row.get("price","").strip()
+    url = row.get("url","").strip()
+    sku = row.get("sku","").strip()
+
+    lines = []
+    if name: lines.append(f"**{name}**")
+    if price: lines.append(f"Fiyat: {price}")
+    if url: lines.append(f"{url}")
+    else: lines.append(f"SKU: {sku}")
+    return "\n".join(lines)
+
+
+# -------------------------------
+# ALBÜM GÖRSELLERİ
+# -------------------------------
+class MediaUploader:
+    """
+    Her görsel koşu başına bir kez indirilir, yüklenir ve UploadMedia ile
+    Telegram'a fotoğraf olarak kaydedilir; dönen InputMediaPhoto tüm hedeflerde
+    yeniden kullanılır. (upload_file'ın InputFile'ı verilseydi send_file her
+    albümde her görsel için ayrıca UploadMedia çağırırdı.) Aynı anda isteyenler
+    aynı görevi bekler.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._tasks = {}
+
+    async def _upload(self, url):
+        r = await asyncio.to_thread(fetch.get, url)
+        name = os.path.basename(urlparse(url).path) or "image.jpg"
+        f = await self.client.upload_file(r.content, file_name=name)
+        res = await self.client(UploadMediaRequest(InputPeerSelf(), InputMediaUploadedPhoto(f)))
+        return utils.get_input_media(res.photo)
+
+    def _task(self, url):
+        task = self._tasks.get(url)
+        if task is None:
+            task = self._tasks[url] = asyncio.ensure_future(self._upload(url))
+        return task
+
+    async def __call__(self, urls):
+        return [await self._task(u) for u in urls]
+
+    async def prefetch(self, urls):
+        """Görselleri paralel hazırlar; yüklenebilenlerin kümesini döner."""
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self._task(u) for u in urls), return_exceptions=True)
+        ok = set()
+        for url, res in zip(urls, results):
+            if isinstance(res, Exception):
+                print(f"[TG] Görsel alınamadı, ürün metin olarak gidecek: {url} ({res})")
+            else:
+                ok.add(url)
+        return ok
+
+
+def build_jobs(candidates, sources, album_urls=frozenset()):
+    """
+    Hedef başına işler: görseli hazır ürünler ALBUM_MAX'lık albümlere,
+    kalanlar tek tek metin mesajına.
+    """
+    album_rows, text_rows = [], []
+    for row in candidates:
+        img = (row.get("image") or "").strip()
+        (album_rows if img and img in album_urls else text_rows).append(row)
+
+    groups = []
+    for i in range(0, len(album_rows), ALBUM_MAX):
+        groups.append([
+            {"sku": r.get("sku","").strip(), "name": r.get("name","").strip(), "url": r.get("url","").strip(),
+             "image": r["image"].strip(), "caption": build_message(r)[:CAPTION_MAX]}
+            for r in album_rows[i:i + ALBUM_MAX]
+        ])
+
+    jobs = []
+    for target in sources:
+        for items in groups:
+            jobs.append({"target": target, "items": items, "attempts": 0})
+        for row in text_rows:
+            jobs.append({"sku": row.get("sku","").strip(), "name": row.get("name","").strip(),
+                         "url": row.get("url","").strip(), "target": target, "msg": build_message(row),
+                         "attempts": 0})
+    return jobs
+
+
+# -------------------------------
+# ADAY SEÇİMİ (akış halinde)
+# -------------------------------
+def iter_report(path):
+    """Raporu satır satır okur; ayraç (; ya da ,) başlıktan anlaşılır, BOM atlanır."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        head = f.readline()
+        delim = ";" if head.count(";") > head.count(",") else ","
+        fields = [h.strip() for h in next(csv.reader([head], delimiter=delim), [])]
+        for row in csv.DictReader(f, fieldnames=fields, delimiter=delim):
+            yield {k: (v or "") for k, v in row.items() if k is not None}
+
+
+def _score(row, priority):
+    if priority == "commission":
+        v = parse_price(row.get("estimated_commission_try") or row.get("estimated_commission"))
+        if v is None:
+            price, rate = parse_price(row.get("price")), parse_price(row.get("commission"))
+            v = price * rate if price is not None and rate is not None else None
+    elif priority == "price_change":
+        # en büyük indirim (en negatif değişim) önce
+        raw = (row.get("price_change") or "").strip()
+        v = parse_price(raw.lstrip("-"))
+        if v is not None and not raw.startswith("-"):
+            v = -v
+    else:
+        v = None
+    return float("-inf") if v is None else v
+
+
+def pick_candidates(rows, store, batch, priority=""):
+    """
+    Log'da olmayan ilk `batch` ürün; priority verilirse tek geçişte en yüksek
+    puanlı `batch` ürün (boyutu batch olan min-heap). Bellek batch ile sınırlı.
+    """
+    chunk_size = max(batch, 1) * 4
+    picked, heap, seq = {}, [], 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        skus = [r.get("sku", "").strip() for r in chunk]
+        already = store.posted(sku for sku in skus if sku)
+        for row, sku in zip(chunk, skus):
+            if not sku or sku in already or sku in picked:
+                continue
+            if not priority:
+                picked[sku] = row
+                if len(picked) >= batch:
+                    return list(picked.values())
+                continue
+            # eşit puanda dosyada önce gelen kalır
+            item = (_score(row, priority), -seq, sku, row)
+            seq += 1
+            if len(heap) < batch:
+                heapq.heappush(heap, item)
+                picked[sku] = row
+            elif item[:2] > heap[0][:2]:
+                out = heapq.heappushpop(heap, item)
+                picked.pop(out[2], None)
+                picked[sku] = row
+    if priority:
+        return [it[3] for it in sorted(heap, key=lambda it: it[:2], reverse=True)]
+    return list(picked.values())
+
 
 async def run():
     if API_ID == 0 or not API_HASH or not SESSION:
         print("[TG] API/SESSION eksik, gönderim atlandı.")
         return
 
-    if not os.path.exists(PRETTY_CSV):
-        print("[TG] TRM_REPORT_PRETTY.csv yok; gönderim atlandı.")
+    report = DELTA_CSV if USE_DELTA else PRETTY_CSV
+    if not os.path.exists(report):
+        print(f"[TG] {os.path.basename(report)} yok; gönderim atlandı.")
         return
 
-    df = pd.read_csv(PRETTY_CSV, dtype=str, encoding="utf-8", engine="python").fillna("")
     sources = load_sources()
-    if not len(df):
-        print("[TG] Gönderilecek ürün yok.")
-        return
     if not sources:
         print("[TG] TELEGRAM_SOURCE boş; gönderim atlandı.")
         return
 
-    already = load_log()
-    # tekrar gönderme
-    candidates = []
-    for _, row in df.iterrows():
-        sku = row.get("sku","").strip()
-        if not sku or sku in already:
-            continue
-        candidates.append(row.to_dict())
-        if len(candidates) >= BATCH:
-            break
+    store = PostStore()
+    queued = load_queue(RETRY_QUEUE)
+    # kuyrukta karşılığı olmayan message_id'siz kayıt (düşülmüş / kaybolmuş iş) ürünü kilitlemesin
+    orphans = store.pending() - {(sku, job["target"]) for job in queued for sku in job_skus(job)}
+    if orphans:
+        print(f"[TG] Kuyrukta olmayan {store.release(orphans)} gönderilmemiş kayıt depodan silindi.")
+    # tekrar gönderme: SKU'lar parça parça indeksten sorulur, dosya sonuna kadar okunmaz
+    rows = iter_report(report)
+    if USE_DELTA:
+        rows = (r for r in rows if r.get("change") in DELTA_CHANGES)
+    candidates = pick_candidates(rows, store, BATCH, PRIORITY)
 
-    if not candidates:
+    if not candidates and not queued:
         print("[TG] Yeni ürün bulunamadı (log’a göre).")
+        store.close()
         return
 
     client = TelegramClient(StringSession(SESSION), API_ID, API_HASH)
     await client.connect()
     if not await client.is_user_authorized():
         print("[TG] Session yetkisiz; yeni session gerekiyor.")
+        store.close()
         return
 
-    sent = []
-    for row in candidates:
-        name = row.get("name","").strip()
-        price = row.get("price","").strip()
-        url = row.get("url","").strip()
-        sku = row.get("sku","").strip()
-
-        # mesaj
-        lines = []
-        if name: lines.append(f"**{name}**")
-        if price: lines.append(f"Fiyat: {price}")
-        if url: lines.append(f"{url}")
-        else: lines.append(f"SKU: {sku}")
-        msg = "\n".join(lines)
-
-        for target in sources:
-            try:
-                entity = await client.get_entity(target)
-                await client.send_message(entity, msg, link_preview=True)
-            except FloodWaitError as e:
-                print(f"[TG] Flood wait: {e.seconds}s bekleniyor…")
-                await asyncio.sleep(e.seconds + 1)
-                entity = await client.get_entity(target)
-                await client.send_message(entity, msg, link_preview=True)
-            except Exception as ex:
-                print(f"[TG] '{target}' için hata: {ex}")
-
-        sent.append({"sku": sku, "name": name})
-
-    if sent:
-        append_log(sent)
-        print(f"[TG] {len(sent)} ürün gönderildi ve log’a işlendi.")
-
-    await client.disconnect()
+    # önceki koşudan kalan işlerin hedefleri de çözülmeli
+    targets = list(dict.fromkeys(sources + [job["target"] for job in queued]))
+    peers = await resolve_targets(client, targets)
+    if not peers:
+        print("[TG] Hiçbir hedef çözülemedi; gönderim atlandı.")
+        store.close()
+        await client.disconnect()
+        return
+
+    media = MediaUploader(client)
+    album_urls = frozenset()
+    if ALBUM:
+        album_urls = await media.prefetch(r.get("image","").strip() for r in candidates if r.get("image","").strip())
+
+    # kuyruk önce boşaltılır; hedef başına sıra korunur
+    jobs = list(queued) + build_jobs(candidates, sources, album_urls)
+
+    # her iş bitince depoya yazılır; kuyruğa alınan mesaj message_id'siz kaydedilir
+    queued_ids = {id(job) for job in queued}
+    finished = set()
+    started_skus = set()
+
+    def on_done(job, ok):
+        finished.add(id(job))
+        if "items" in job:
+            ids = job.get("message_ids", []) if ok else []
+            for i, it in enumerate(job["items"]):
+                started_skus.add(it["sku"])
+                store.record(it["sku"], job["target"], it["url"], it["name"], ids[i] if i < len(ids) else None)
+            return
+        started_skus.add(job["sku"])
+        store.record(job["sku"], job["target"], job.get("url", ""), job.get("name", ""),
+                     job.get("message_id") if ok else None)
+
+    async def refresh(target):
+        return (await resolve_targets(client, [target], refresh={target})).get(target)
+
+    scheduler = SendScheduler(client, peers, refresh, media)
+    try:
+        await scheduler.run(jobs, on_done)
+    finally:
+        # yarıda kesilirse: işlenmemiş kuyruk işleri ve depoya girmiş ürünlerin
+        # kalan hedefleri kuyrukta kalır (diğer ürünler sonraki koşuda yeniden seçilir)
+        left = [job for job in jobs if id(job) not in finished
+                and (id(job) in queued_ids or started_skus.intersection(job_skus(job)))]
+        save_queue(RETRY_QUEUE, left + scheduler.failed)
+        # MAX_ATTEMPTS aşıldı: ürün gönderilmiş sayılmasın, sonraki koşuda yeniden seçilsin
+        store.release((sku, job["target"]) for job in scheduler.dropped for sku in job_skus(job))
+        print(f"[TG] {scheduler.sent} mesaj gönderildi, {len(started_skus)} ürün depoya işlendi, "
+              f"{len(left) + len(scheduler.failed)} mesaj yeniden deneme kuyruğunda.")
+        store.close()
+        await client.disconnect()
 
 if __name__ == "__main__":
     asyncio.run(run())
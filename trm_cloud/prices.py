@@ -0,0 +1,105 @@
+# trm_cloud/prices.py
+# -*- coding: utf-8 -*-
+"""
+Ortak fiyat normalizasyonu (TR / Avrupa biçimleri)
+--------------------------------------------------
+Kurallar (skaler ve vektörel yol aynı):
+- Metindeki ilk sayı parçası alınır ("₺1.299,90", "1.299,90 TL", "199.90").
+- Hem '.' hem ',' varsa en sağdaki ondalık, diğerleri binlik ayırıcıdır.
+- Yalnız ',' varsa: tek virgül ondalık ("199,90"), birden fazlaysa binlik.
+- Yalnız '.' varsa: birden fazlaysa binlik ("1.234.567"); tek nokta ve ardından
+  tam 3 hane + sıfırla başlamayan tam kısım ise binlik ("1.299" → 1299),
+  aksi halde ondalık ("199.90", "0.125").
+- Sayı zaten int/float ise olduğu gibi döner (NaN → None).
+"""
+
+import math
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# sayı parçası: ayırıcılarla birlikte
+_TOKEN_RE = re.compile(r"\d[\d.,]*\d|\d")
+# hızlı yol: ayırıcısız ya da 1-2 ondalıklı noktalı düz sayı
+_PLAIN_RE = re.compile(r"\d+(?:\.\d{1,2})?")
+# tek noktalı binlik: "1.299", "12.500", "999.000"
+_DOT_THOUSANDS_RE = re.compile(r"[1-9]\d{0,2}\.\d{3}")
+# sonuncusu hariç tüm ayırıcılar / tüm ayırıcılar
+_OTHER_SEPS_RE = re.compile(r"[.,](?=.*[.,])")
+_ANY_SEP_RE = re.compile(r"[.,]")
+
+# serbest metin içinde "… TL" fiyatı (scrape_site profili yedek arama)
+PRICE_IN_TEXT_RE = re.compile(r"(\d[\d\.]*,\d{2}|\d[\d\.]*)\s*TL", re.I)
+
+
+def _last_sep_is_decimal(tok: str) -> bool:
+    n_c = tok.count(",")
+    n_d = tok.count(".")
+    if n_c and n_d:
+        return True
+    if n_c:
+        return n_c == 1
+    if n_d:
+        return n_d == 1 and not _DOT_THOUSANDS_RE.fullmatch(tok)
+    return False
+
+
+def _normalize_token(tok: str) -> str:
+    # sondaki ayırıcı dışındakiler binliktir; sondaki ondalıksa '.' olur
+    if _last_sep_is_decimal(tok):
+        return _OTHER_SEPS_RE.sub("", tok).replace(",", ".")
+    return _ANY_SEP_RE.sub("", tok)
+
+
+def parse_price(value) -> Optional[float]:
+    """Tek değer → float ya da None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        v = float(value)
+        return None if math.isnan(v) else v
+    s = str(value).strip()
+    if not s:
+        return None
+    if _PLAIN_RE.fullmatch(s):
+        return float(s)
+    m = _TOKEN_RE.search(s)
+    if not m:
+        return None
+    return float(_normalize_token(m.group(0)))
+
+
+def parse_price_series(col: pd.Series) -> pd.Series:
+    """Sütun → float64 Series (ayrıştırılamayanlar NaN); satır satır Python çağrısı yok."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype("float64")
+
+    out = pd.Series(np.nan, index=col.index, dtype="float64")
+    is_str = col.map(type).eq(str)
+    # karışık sütunda zaten sayı olan hücreler
+    if (~is_str).any():
+        out[~is_str] = pd.to_numeric(col[~is_str], errors="coerce")
+    if not is_str.any():
+        return out
+
+    tok = col[is_str].str.extract(f"({_TOKEN_RE.pattern})", expand=False)
+    ok = tok.notna()
+    tok = tok[ok]
+    if tok.empty:
+        return out
+
+    n_c = tok.str.count(",")
+    n_d = tok.str.count(r"\.")
+    dec = ((n_c > 0) & (n_d > 0)) | ((n_c == 1) & (n_d == 0)) | (
+        (n_c == 0) & (n_d == 1) & ~tok.str.fullmatch(_DOT_THOUSANDS_RE.pattern)
+    )
+
+    norm = tok.str.replace(_ANY_SEP_RE.pattern, "", regex=True)
+    norm[dec] = (
+        tok[dec].str.replace(_OTHER_SEPS_RE.pattern, "", regex=True).str.replace(",", ".", regex=False)
+    )
+
+    out[norm.index] = pd.to_numeric(norm, errors="coerce")
+    return out
@@ -0,0 +1,160 @@
+# trm_cloud/product_store.py
+# -*- coding: utf-8 -*-
+"""
+Ürün deposu + değişim (delta) çıkarımı (SQLite, WAL)
+----------------------------------------------------
+- products: anahtar (URL; URL yoksa "sku:<sku>") başına son satır ve içerik
+  özeti (name/price/image üzerinden 64 bit hash), active bayrağı.
+- price_history: yalnızca ekleme; ürün ilk görüldüğünde ve fiyatı her
+  değiştiğinde (key, ts, price) satırı.
+- diff(): bu koşunun çerçevesi ile depodaki aktif ürünler tek bir hash-join
+  (pandas merge) ile karşılaştırılır; yalnızca değişen satırlar yazılır ve
+  delta döner:
+    new        → ilk kez görülen ürün
+    price_drop → fiyatı düşen ürün (old_price, price_change dolu)
+    removed    → önceki koşuda vardı, bu koşuda yok
+"""
+
+import sqlite3
+import time
+from typing import Optional
+
+import pandas as pd
+
+HASH_COLS = ("name", "price", "image")
+DELTA_COLS = ["change", "old_price", "price_change"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    key        TEXT PRIMARY KEY,
+    sku        TEXT,
+    name       TEXT,
+    price      REAL,
+    url        TEXT,
+    image      TEXT,
+    hash       INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen  INTEGER NOT NULL,
+    active     INTEGER NOT NULL DEFAULT 1
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS products_active ON products (active);
+CREATE TABLE IF NOT EXISTS price_history (
+    key   TEXT NOT NULL,
+    ts    INTEGER NOT NULL,
+    price REAL,
+    PRIMARY KEY (key, ts)
+) WITHOUT ROWID;
+"""
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    url = df["url"].fillna("").astype(str) if "url" in df else pd.Series("", index=df.index)
+    sku = df["sku"].fillna("").astype(str) if "sku" in df else pd.Series("", index=df.index)
+    return url.where(url != "", "sku:" + sku)
+
+
+def content_hash(df: pd.DataFrame) -> pd.Series:
+    cols = pd.DataFrame({c: (df[c] if c in df else "") for c in HASH_COLS}, index=df.index)
+    cols["price"] = pd.to_numeric(cols["price"], errors="coerce").round(2)
+    # SQLite INTEGER işaretli 64 bit
+    return pd.util.hash_pandas_object(cols.astype(str), index=False).astype("int64")
+
+
+def _none(v):
+    return None if pd.isna(v) else v
+
+
+class ProductStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    def diff(self, df: pd.DataFrame, ts: Optional[int] = None) -> pd.DataFrame:
+        """
+        df (make_pretty çıktısı) depoya işlenir; delta çerçevesi döner
+        (df sütunları + change, old_price, price_change).
+        """
+        ts = ts or int(time.time())
+        cur = df.copy()
+        cur["key"] = row_keys(cur)
+        cur = cur[cur["key"] != "sku:"].drop_duplicates("key", keep="last")
+        # NaN'lı birleştirmede float'a dönüp hassasiyet kaybetmesin
+        cur["hash"] = content_hash(cur).astype("Int64")
+        cur["price"] = pd.to_numeric(cur["price"], errors="coerce") if "price" in cur else float("nan")
+
+        old = pd.read_sql_query(
+            "SELECT key, hash AS old_hash, price AS old_price, sku AS old_sku, name AS old_name, "
+            "url AS old_url, image AS old_image FROM products WHERE active = 1",
+            self.db,
+        )
+        old["old_hash"] = old["old_hash"].astype("Int64")
+        old["old_price"] = pd.to_numeric(old["old_price"], errors="coerce")
+        j = cur.merge(old, on="key", how="outer", indicator=True)
+
+        is_new = j["_merge"] == "left_only"
+        is_gone = j["_merge"] == "right_only"
+        both = j["_merge"] == "both"
+        changed = both & (j["hash"] != j["old_hash"]).fillna(True).astype(bool)
+        repriced = changed & (j["price"].round(2) != j["old_price"].round(2))
+
+        # depo: yalnızca yeni/değişen satırlar yazılır, kaybolanlar pasif olur
+        up = j[is_new | changed]
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO products (key, sku, name, price, url, image, hash, first_seen, last_seen, active) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET sku = excluded.sku, name = excluded.name, "
+                "price = excluded.price, url = excluded.url, image = excluded.image, hash = excluded.hash, "
+                "last_seen = excluded.last_seen, active = 1",
+                (
+                    (r.key, _none(r.sku), _none(r.name), _none(r.price), _none(r.url), _none(r.image),
+                     int(r.hash), ts, ts)
+                    for r in up.reindex(columns=["key", "sku", "name", "price", "url", "image", "hash"])
+                    .itertuples(index=False)
+                ),
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO price_history (key, ts, price) VALUES (?, ?, ?)",
+                ((k, ts, _none(p)) for k, p in zip(j.loc[is_new | repriced, "key"], j.loc[is_new | repriced, "price"])),
+            )
+            self.db.executemany(
+                "UPDATE products SET active = 0, last_seen = ? WHERE key = ?",
+                ((ts, k) for k in j.loc[is_gone, "key"]),
+            )
+            # bu koşuda da görülen (değişmeyen) ürünler
+            self.db.executemany(
+                "UPDATE products SET last_seen = ? WHERE key = ?",
+                ((ts, k) for k in j.loc[both & ~changed, "key"]),
+            )
+
+        # kaybolanların görünen alanları depodaki son halden
+        for c in ("sku", "name", "url", "image"):
+            if c in j and "old_" + c in j:
+                j.loc[is_gone, c] = j.loc[is_gone, "old_" + c]
+        j.loc[is_gone, "price"] = j.loc[is_gone, "old_price"]
+
+        drop = repriced & (j["price"] < j["old_price"])
+        j["change"] = ""
+        j.loc[is_new, "change"] = "new"
+        j.loc[drop, "change"] = "price_drop"
+        j.loc[is_gone, "change"] = "removed"
+        j["price_change"] = (j["price"] - j["old_price"]).where(drop).round(2)
+        j["old_price"] = j["old_price"].where(drop | is_gone)
+
+        out_cols = [c for c in df.columns] + DELTA_COLS
+        return j.loc[j["change"] != "", out_cols].reset_index(drop=True)
+
+    def history(self, key: str):
+        return self.db.execute("SELECT ts, price FROM price_history WHERE key = ? ORDER BY ts", (key,)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,44 @@
+# trm_cloud/ratelimit.py
+# -*- coding: utf-8 -*-
+"""
+asyncio için token-bucket hız sınırlayıcı.
+rate: saniyede eklenen jeton, burst: kovanın kapasitesi.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(rate, 1e-9)
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float):
+        """Kovayı belirtilen süre kapatır (ör. sunucu "bekle" dediğinde)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self, tokens: float = 1.0):
+        # kilit, bekleyenlerin sırayla (FIFO) jeton almasını sağlar
+        async with self._lock:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    self.updated = time.monotonic()
+                    continue
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,135 @@
+# trm_cloud/report_writer.py
+# -*- coding: utf-8 -*-
+"""
+Ortak rapor yazıcı
+------------------
+- Tek bellek içi DataFrame'den, dosyayı yeniden okumadan tüm çıktılar:
+    excel   → <ad>.csv        utf-8-sig, sep=';'  (TR/Excel; varsayılan, her zaman yazılır)
+    utf8    → <ad>.utf8.csv   düz UTF-8, sep=','
+    parquet → <ad>.parquet    (pyarrow / fastparquet kuruluysa)
+    xlsx    → <ad>.xlsx       (openpyxl)
+  Seçim: TRM_REPORT_FORMATS="excel,utf8,xlsx"
+- Kodlama ve ayraç tespiti dosyanın baştaki küçük bir örneğinden yapılır;
+  dosya farklı kodlamalarla defalarca baştan okunmaz.
+"""
+
+import codecs
+import io
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+SAMPLE_BYTES = 64 * 1024
+FORMATS = [f.strip() for f in os.getenv("TRM_REPORT_FORMATS", "excel").split(",") if f.strip()]
+EXCEL_ENCODING = "utf-8-sig"
+EXCEL_SEP = ";"
+
+
+# -------------------------------
+# TESPİT
+# -------------------------------
+def detect_encoding(path: str, sample_bytes: int = SAMPLE_BYTES) -> str:
+    """BOM → utf-8-sig; örnek UTF-8 olarak çözülüyorsa utf-8; değilse cp1254 (TR Windows)."""
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # örnek çok baytlı bir karakterin ortasında bitebilir: final=False
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1254")
+        return "cp1254"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def sniff(path: str) -> Tuple[str, str]:
+    """(kodlama, ayraç); ayraç başlık satırındaki ';' / ',' sayısından."""
+    enc = detect_encoding(path)
+    with open(path, "r", encoding=enc, newline="") as f:
+        head = f.readline()
+    sep = ";" if head.count(";") > head.count(",") else ","
+    return enc, sep
+
+
+def read_table(path: str, **kwargs) -> pd.DataFrame:
+    """Tespit edilen kodlama/ayraçla, hızlı C motoruyla okur (değerler metin olarak)."""
+    enc, sep = sniff(path)
+    kwargs.setdefault("dtype", str)
+    kwargs.setdefault("keep_default_na", False)
+    return pd.read_csv(path, sep=sep, encoding=enc, **kwargs)
+
+
+def is_excel_csv(path: str) -> bool:
+    return sniff(path) == (EXCEL_ENCODING, EXCEL_SEP)
+
+
+# -------------------------------
+# YAZMA
+# -------------------------------
+def _stem(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() == ".csv" else path
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_reports(df: pd.DataFrame, path: str, formats: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    path: Excel CSV'nin yolu (ör. TRM_REPORT_PRETTY.csv); diğer biçimler aynı
+    adla yanına yazılır. Yazılan dosyaların listesini döner.
+    """
+    formats = list(formats if formats is not None else FORMATS)
+    stem = _stem(path)
+    written = []
+
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, sep=EXCEL_SEP)
+    _atomic_write(path, buf.getvalue().encode(EXCEL_ENCODING))
+    written.append(path)
+
+    if "utf8" in formats:
+        out = stem + ".utf8.csv"
+        buf = io.StringIO()
+        df.to_csv(buf, index=False)
+        _atomic_write(out, buf.getvalue().encode("utf-8"))
+        written.append(out)
+
+    if "parquet" in formats:
+        out = stem + ".parquet"
+        try:
+            df.to_parquet(out, index=False)
+            written.append(out)
+        except ImportError as e:
+            print(f"[REPORT] Parquet atlandı (pyarrow/fastparquet yok): {str(e).splitlines()[0]}")
+
+    if "xlsx" in formats:
+        out = stem + ".xlsx"
+        try:
+            df.to_excel(out, index=False, engine="openpyxl")
+            written.append(out)
+        except ImportError as e:
+            print(f"[REPORT] XLSX atlandı (openpyxl yok): {e}")
+
+    return written
+
+
+def normalize_file(path: str) -> bool:
+    """
+    Var olan CSV'yi Excel biçimine (utf-8-sig, ';') getirir. Zaten öyleyse
+    dosyaya dokunulmaz. Yeniden yazıldıysa True.
+    """
+    if not os.path.exists(path) or is_excel_csv(path):
+        return False
+    write_reports(read_table(path), path, formats=())
+    return True
@@ -0,0 +1,173 @@
+# trm_cloud/scrape_async.py
+# -*- coding: utf-8 -*-
+"""
+asyncio tabanlı tarama motoru (scrape_products için alternatif backend)
+----------------------------------------------------------------------
+- HTTP: aiohttp (tek ClientSession, keep-alive, gzip/deflate/br otomatik)
+- Sabit bekleme yerine token-bucket hız sınırı (TRM_RATE istek/sn, TRM_BURST)
+- HTML parse işi thread havuzunda (TRM_PARSE_PROCS > 0 ise süreç havuzunda);
+  event loop parse sırasında bloklanmaz
+- Satırlar scrape_products.scrape_category ile birebir aynı (CategoryWalk),
+  make_pretty / save_csv değişmeden çalışır.
+
+Seçim:
+    TRM_BACKEND=async python trm_cloud/scrape_products.py
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import fetch
+from http_cache import HttpCache
+from parse_stage import PARSER, ParseStage
+from ratelimit import TokenBucket
+from scrape_products import (
+    HDRS,
+    KNOWN_STOP,
+    MAX_PAGES,
+    TIMEOUT,
+    WORKERS,
+    CategoryWalk,
+    collect_rows,
+    parse_html,
+)
+
+try:
+    import aiohttp
+except ImportError:  # yalnızca async backend seçilirse gerekir
+    aiohttp = None
+
+RATE = float(os.getenv("TRM_RATE", str(1.0 / max(fetch.HOST_INTERVAL, 0.01))) or "1")
+BURST = float(os.getenv("TRM_BURST", str(fetch.PER_HOST)) or "1")
+CONCURRENCY = int(os.getenv("TRM_ASYNC_CONCURRENCY", str(max(WORKERS, 4))) or "4")
+PARSE_THREADS = int(os.getenv("TRM_PARSE_THREADS", "2") or "2")
+
+
+class AsyncEngine:
+    def __init__(self, session, cache: Optional[HttpCache], parse_pool,
+                 parse_stage: Optional[ParseStage] = None):
+        self.session = session
+        self.cache = cache
+        self.parse_pool = parse_pool
+        self.parse_stage = parse_stage
+        self.bucket = TokenBucket(RATE, BURST)
+        self.host_sem = asyncio.Semaphore(fetch.PER_HOST)
+
+    async def _get(self, url: str, headers: Dict[str, str]):
+        """fetch.get ile aynı kurallar: 429/5xx'te jitter'lı backoff, ortak bütçe/sayaç."""
+        last_err = ""
+        for attempt in range(fetch.RETRIES + 1):
+            fetch.take_budget()
+            retry_after = None
+            await self.bucket.acquire()
+            try:
+                async with self.host_sem:
+                    async with self.session.get(url, headers=headers) as r:
+                        if r.status in (200, 304):
+                            charset = r.charset if "charset" in r.headers.get("Content-Type", "").lower() else None
+                            body = await r.read() if r.status == 200 else b""
+                            return r.status, r.headers, body, charset
+                        last_err = f"HTTP {r.status}"
+                        if r.status not in fetch.RETRY_STATUSES:
+                            break
+                        retry_after = r.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_err = str(e) or type(e).__name__
+
+            if attempt < fetch.RETRIES:
+                fetch.count("retries")
+                await asyncio.sleep(fetch.backoff_delay(attempt, retry_after))
+
+        fetch.count("errors")
+        raise fetch.FetchError(f"{url}: {last_err}")
+
+    async def fetch_page(self, url: str, state: Dict) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        # scrape_products.fetch_page'in async karşılığı; state yerinde güncellenir
+        hdrs = dict(HDRS)
+        if self.cache is not None:
+            hdrs.update(self.cache.validators(url))
+        try:
+            status, headers, body, charset = await self._get(url, hdrs)
+        except fetch.FetchError as e:
+            print(f"[WARN] {e}")
+            return None
+
+        if status == 304:
+            entry = self.cache.hit(url) if self.cache is not None else None
+            if entry is None:
+                return None
+            return [dict(it) for it in entry["rows"]], entry["next"] or None
+
+        loop = asyncio.get_running_loop()
+        if self.parse_stage is not None:
+            # thread, süreç havuzunun kuyruğunda bekler (backpressure loop'u bloklamaz)
+            items, nxt, new_state = await loop.run_in_executor(
+                self.parse_pool, self.parse_stage.parse, body, url, charset, state)
+        else:
+            items, nxt, new_state = await loop.run_in_executor(
+                self.parse_pool, parse_html, body, url, PARSER, charset, state)
+        if new_state is not state:
+            state.clear()
+            state.update(new_state)
+        if self.cache is not None:
+            self.cache.store(url, headers, items, nxt)
+        return items, nxt
+
+    async def scrape_category(self, cat_url: str, known: Optional[set] = None,
+                              stop_after: int = KNOWN_STOP) -> List[Dict]:
+        walk = CategoryWalk(cat_url, known, stop_after)
+        url = cat_url
+        for _ in range(MAX_PAGES):
+            got = await self.fetch_page(url, walk.state)
+            if not got:
+                break
+            items, nxt = got
+            if not walk.feed(items):
+                break
+            if not nxt or nxt == url:
+                break
+            url = nxt
+        return walk.rows
+
+
+async def scrape_all_async(categories: List[str], seen_index: Optional[Dict[str, set]] = None,
+                           cache: Optional[HttpCache] = None,
+                           parse_stage: Optional[ParseStage] = None) -> List[List[Dict]]:
+    if aiohttp is None:
+        raise RuntimeError("async backend için 'aiohttp' gerekli (pip install aiohttp)")
+
+    sem = asyncio.Semaphore(max(1, CONCURRENCY))
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    connector = aiohttp.TCPConnector(limit_per_host=fetch.PER_HOST)
+    total = len(categories)
+
+    threads = PARSE_THREADS if parse_stage is None else max(PARSE_THREADS, 2 * parse_stage.workers)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        async with aiohttp.ClientSession(headers=fetch.DEFAULT_HEADERS, timeout=timeout,
+                                         connector=connector) as session:
+            engine = AsyncEngine(session, cache, pool, parse_stage)
+
+            async def one(idx: int, cu: str) -> List[Dict]:
+                async with sem:
+                    print(f"[SCRAPE] ({idx}/{total}) {cu}")
+                    known = seen_index.get(cu, set()) if seen_index is not None else None
+                    try:
+                        return await engine.scrape_category(cu, known)
+                    except Exception as e:
+                        print(f"[WARN] {cu} hatası: {e}")
+                        return []
+
+            # gather sonuçları categories sırasıyla döndürür
+            return await asyncio.gather(*(one(i, cu) for i, cu in enumerate(categories, 1)))
+
+
+def scrape_all(categories: List[str], seen_index: Optional[Dict[str, set]] = None,
+               cache: Optional[HttpCache] = None,
+               parse_stage: Optional[ParseStage] = None) -> pd.DataFrame:
+    """scrape_products.scrape_all ile aynı çıktı (categories sırası korunur)."""
+    per_cat = asyncio.run(scrape_all_async(categories, seen_index, cache, parse_stage))
+    return collect_rows(categories, per_cat, seen_index)
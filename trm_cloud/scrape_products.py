@@ -13,16 +13,27 @@ Koşum şekli (GitHub Actions veya lokal):
 """
 
 import os
-import re
-import time
 import csv
-from typing import List, Dict, Optional
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
-import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 
+import extractors
+import commissions
+import dedupe
+import fetch
+import prices
+import report_writer
+import sitemap
+from http_cache import HttpCache
+from product_store import ProductStore
+from sku_index import SkuIndex, fill_skus
+from parse_stage import PARSE_PROCS, PARSER, ParseStage
+
 
 # -------------------------------
 # YAPILANDIRMA
@@ -32,6 +43,16 @@ CATEGORIES_FILE = os.path.join(ROOT_DIR, "categories.txt")
 
 OUT_RAW = os.path.join(ROOT_DIR, "TRM_PRODUCTS.csv")
 OUT_PRETTY = os.path.join(ROOT_DIR, "TRM_REPORT_PRETTY.csv")
+# yalnızca değişen ürünler (new / price_drop / removed), bkz. product_store.py
+OUT_DELTA = os.path.join(ROOT_DIR, "TRM_DELTA.csv")
+# ürün deposu + fiyat geçmişi (boş bırakılırsa delta üretilmez)
+PRODUCT_DB = os.getenv("TRM_PRODUCT_DB", os.path.join(ROOT_DIR, "TRM_PRODUCTS.sqlite"))
+# kanonik URL → kalıcı SKU (sitede SKU yoksa)
+SKU_DB = os.getenv("TRM_SKU_DB", os.path.join(ROOT_DIR, "TRM_SKU_INDEX.sqlite"))
+# ETag/Last-Modified önbelleği (boş bırakılırsa kapalı)
+HTTP_CACHE_FILE = os.getenv("TRM_HTTP_CACHE", os.path.join(ROOT_DIR, "TRM_HTTP_CACHE.json"))
+# Artımlı mod: kategori başına daha önce görülen ürün URL'leri
+SEEN_INDEX_FILE = os.path.join(ROOT_DIR, "TRM_SEEN_INDEX.json")
 
 # HTTP ayarları
 HDRS = {
@@ -41,52 +62,39 @@ HDRS = {
     )
 }
 TIMEOUT = 20
-SLEEP_BETWEEN = 0.8  # istekler arasında bekleme (sn)
+MAX_PAGES = 50  # kategori başına güvenlik amaçlı maksimum sayfa
+
+# Paralel tarama (host başına sınır: fetch.PER_HOST / fetch.HOST_INTERVAL)
+WORKERS = int(os.getenv("TRM_WORKERS", "1") or "1")  # aynı anda taranan kategori sayısı
+
+# Artımlı mod: art arda bu kadar bilinen kart görülünce sayfalama durur,
+# sonuç mevcut TRM_PRODUCTS.csv ile birleştirilir.
+INCREMENTAL = os.getenv("TRM_INCREMENTAL", "0") == "1"
+KNOWN_STOP = int(os.getenv("TRM_KNOWN_STOP", "20") or "20")
+
+# commission_rates.csv'de olmayan kategoriler için oran
+DEFAULT_COMMISSION = float(os.getenv("TRM_DEFAULT_COMMISSION", "0.10") or "0.10")
+
+# Tarama motoru: "sync" (requests + thread havuzu) veya "async" (scrape_async.py)
+BACKEND = os.getenv("TRM_BACKEND", "sync").strip().lower()
+# Ürün keşfi: "categories" (kategori sayfalama) veya "sitemap" (sitemap.xml +
+# ürün sayfasında JSON-LD / itemprop; bkz. sitemap.py). TRM_SITEMAP boşsa
+# ilk kategorinin sitesindeki /sitemap.xml; yerel dosya yolu da olabilir.
+DISCOVERY = os.getenv("TRM_DISCOVERY", "categories").strip().lower()
+SITEMAP_URL = os.getenv("TRM_SITEMAP", "")
+SITEMAP_BATCH = 200  # aynı anda kuyruğa alınan ürün sayfası
+# Akışlı mod: sayfa sayfa rapora yazım + checkpoint'ten devam (scrape_stream.py)
+STREAM = os.getenv("TRM_STREAM", "0") == "1"
+
+CACHE: Optional[HttpCache] = None  # main() içinde açılır
+PARSE_STAGE: Optional[ParseStage] = None  # TRM_PARSE_PROCS > 0 ise main() içinde açılır
 
 
 # -------------------------------
-# SEÇİCİLER (esnek tutuldu)
+# SEÇİCİLER (esnek tutuldu; derlenmiş profil: extractors.PROFILES["trm_products"])
 # -------------------------------
-SELECTORS = {
-    "product_card": [
-        ".product-card",
-        ".product-item",
-        "article.product",
-        "li.product",
-        "div.product",
-    ],
-    "title": [
-        ".product-title",
-        ".card-title",
-        "h2 a",
-        "h2.product-title a",
-        "h3 a",
-        "a.product-name",
-    ],
-    "price": [
-        ".price",
-        ".current-price",
-        ".product-price",
-        ".amount",
-        "span.woocommerce-Price-amount",
-    ],
-    "link": [
-        "a.product-link",
-        ".product-title a",
-        "a.card-link",
-        "a",
-    ],
-    "sku": [
-        "[data-sku]",
-        ".sku",
-        ".product-sku",
-    ],
-    "pagination_next": [
-        "a.next",
-        "a[rel='next']",
-        ".pagination .next a",
-    ],
-}
+PROFILE = "trm_products"
+SELECTORS = extractors.PRODUCTS_SELECTORS
 
 
 # -------------------------------
@@ -104,15 +112,6 @@ def read_categories(fp: str) -> List[str]:
     return urls
 
 
-def soup_get(url: str) -> Optional[BeautifulSoup]:
-    try:
-        r = requests.get(url, headers=HDRS, timeout=TIMEOUT)
-        r.raise_for_status()
-        return BeautifulSoup(r.text, "html.parser")
-    except Exception:
-        return None
-
-
 def first_text(el) -> str:
     if not el:
         return ""
@@ -141,148 +140,347 @@ def pick_many(soup: BeautifulSoup, selectors: List[str]):
 
 
 def price_to_float(txt: str) -> Optional[float]:
-    if not txt:
+    # ortak kurallar: prices.py (12.345,67 / 12,345.67 / 1.299 TL vb.)
+    return prices.parse_price(txt)
+
+
+def find_product_cards(page: BeautifulSoup):
+    return extractors.find_cards(page, extractors.PROFILES[PROFILE])[0]
+
+
+def to_row(raw: Dict[str, str], base_url: str) -> Dict:
+    # extractors ham kartı → TRM_PRODUCTS.csv satırı
+    href = raw["url"]
+    img = raw.get("image") or ""
+    price_val = price_to_float(raw["price"])
+    return {
+        "sku": raw["sku"] or "",
+        "name": raw["name"] or "",
+        "price": price_val if price_val is not None else "",
+        "url": urljoin(base_url, href) if href else "",
+        "image": urljoin(base_url, img) if img else "",
+    }
+
+
+def extract_card(card, base_url: str) -> Dict:
+    """Tek geçişte kartın link/başlık/fiyat/sku/görsel alanlarını çıkarır."""
+    return to_row(extractors.extract_card(card, extractors.PROFILES[PROFILE]), base_url)
+
+
+def parse_page(page: BeautifulSoup, url: str,
+               state: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str], Dict]:
+    """
+    Sayfanın kartları + sonraki sayfa URL'i. state, kategori için tespit edilen
+    profili ve kart seçicisini taşır (ilk sayfadan sonra tespit atlanır).
+    """
+    state = {} if state is None else state
+    raws, href = extractors.extract_page(page, state, prefer=PROFILE)
+    items = [to_row(r, url) for r in raws]
+    return items, (urljoin(url, href) if href else None), state
+
+
+def parse_html(content: bytes, url: str, parser: str = "html.parser", encoding: Optional[str] = None,
+               state: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str], Dict]:
+    # Ham bayttan parse (havuzlarda çalıştırılabilsin diye düz fonksiyon)
+    return parse_page(BeautifulSoup(content, parser, from_encoding=encoding), url, state)
+
+
+def fetch_page(url: str, state: Optional[Dict] = None) -> Optional[Tuple[List[Dict], Optional[str]]]:
+    """
+    Sayfayı getirip parse eder: (kartlar, sonraki_sayfa).
+    Önbellekte doğrulayıcı varsa koşullu istek atar; 304 gelirse parse etmeden
+    geçen koşudaki kartları döndürür. Alınamazsa None. state yerinde güncellenir.
+    """
+    hdrs = dict(HDRS)
+    if CACHE is not None:
+        hdrs.update(CACHE.validators(url))
+    try:
+        r = fetch.get(url, headers=hdrs, timeout=TIMEOUT, ok_statuses=(200, 304))
+    except fetch.FetchError as e:
+        print(f"[WARN] {e}")
         return None
-    # sayıları ayıkla (12.345,67 veya 12,345.67 vb. durumlar)
-    cleaned = txt
-    cleaned = cleaned.replace("\u00A0", " ").replace("\xa0", " ")
-    cleaned = re.sub(r"[^\d,.\s]", "", cleaned)
-    # virgül nokta normalizasyonu
-    # önce '12.345,67' tipi için nokta ayırıcıyı at, virgülü noktaya çevir
-    if "," in cleaned and "." in cleaned:
-        if cleaned.rfind(",") > cleaned.rfind("."):
-            cleaned = cleaned.replace(".", "").replace(",", ".")
-    elif "," in cleaned and "." not in cleaned:
-        # '123,45' → 123.45
-        cleaned = cleaned.replace(",", ".")
+
+    if r.status_code == 304:
+        entry = CACHE.hit(url) if CACHE is not None else None
+        if entry is None:
+            return None
+        return [dict(it) for it in entry["rows"]], entry["next"] or None
+
+    enc = fetch.declared_encoding(r)
+    state = {} if state is None else state
+    if PARSE_STAGE is not None:
+        items, nxt, new_state = PARSE_STAGE.parse(r.content, url, enc, state)
+    else:
+        items, nxt, new_state = parse_html(r.content, url, PARSER, enc, state)
+    if new_state is not state:  # süreç havuzundan dönen kopya
+        state.clear()
+        state.update(new_state)
+    if CACHE is not None:
+        CACHE.store(url, r.headers, items, nxt)
+    return items, nxt
+
+
+def fetch_product(url: str) -> Optional[Tuple[Optional[Dict], str]]:
+    """
+    Sitemap modunda tek ürün sayfası: (satır, kaynak). Kaynak "jsonld" /
+    "itemprop" / "selectors", 304'te "cache". Alınamazsa None.
+    """
+    hdrs = dict(HDRS)
+    if CACHE is not None:
+        hdrs.update(CACHE.validators(url))
     try:
-        return float(re.findall(r"\d+(?:\.\d+)?", cleaned)[0])
-    except Exception:
+        r = fetch.get(url, headers=hdrs, timeout=TIMEOUT, ok_statuses=(200, 304))
+    except fetch.FetchError as e:
+        print(f"[WARN] {e}")
         return None
 
+    if r.status_code == 304:
+        entry = CACHE.hit(url) if CACHE is not None else None
+        if entry is None:
+            return None
+        return (dict(entry["rows"][0]) if entry["rows"] else None), "cache"
 
-def find_product_cards(page: BeautifulSoup):
-    cards = []
-    for sel in SELECTORS["product_card"]:
-        hits = page.select(sel)
-        if hits:
-            cards = hits
-            break
-    return cards
+    raw, source = sitemap.extract_product(r.content, url, PARSER, fetch.declared_encoding(r), PROFILE)
+    row = to_row(raw, url) if raw is not None else None
+    if CACHE is not None:
+        CACHE.store(url, r.headers, [row] if row else [], None)
+    return row, source
 
 
-def next_page_url(page: BeautifulSoup, base_url: str) -> Optional[str]:
-    for sel in SELECTORS["pagination_next"]:
-        a = page.select_one(sel)
-        if a and a.get("href"):
-            return urljoin(base_url, a["href"])
-    return None
+def scrape_sitemap(src: str, workers: int = WORKERS) -> pd.DataFrame:
+    """
+    Sitemap'teki ürün sayfalarını tarar; sitemap akışla okunur, sayfalar
+    SITEMAP_BATCH'lik gruplar halinde (thread havuzunda) alınır.
+    """
+    print(f"[SITEMAP] {src}")
+    rows: List[Dict] = []
+    sources: Dict[str, int] = {}
+
+    def flush(batch: List[str], ex: Optional[ThreadPoolExecutor]):
+        for got in (ex.map(fetch_product, batch) if ex is not None else map(fetch_product, batch)):
+            if not got:
+                continue
+            row, source = got
+            sources[source] = sources.get(source, 0) + 1
+            if row is not None:
+                rows.append(dict(row, source_category=""))
+
+    ex = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        batch: List[str] = []
+        for url in sitemap.iter_product_urls(src):
+            batch.append(url)
+            if len(batch) >= SITEMAP_BATCH:
+                flush(batch, ex)
+                batch = []
+        flush(batch, ex)
+    except sitemap.READ_ERRORS as e:
+        print(f"[WARN] sitemap okunamadı: {e}")
+    finally:
+        if ex is not None:
+            ex.shutdown()
+
+    print(f"[SITEMAP] {len(rows)} ürün | " + " | ".join(f"{k}: {v}" for k, v in sorted(sources.items())))
+    if not rows:
+        return pd.DataFrame(columns=["sku", "name", "price", "url", "image", "source_category"])
+    return pd.DataFrame(rows)
 
 
 # -------------------------------
 # ÇEKİRDEK SCRAPE
 # -------------------------------
-def scrape_category(cat_url: str) -> List[Dict]:
-    out: List[Dict] = []
-    seen_urls = set()
-    url = cat_url
+class CategoryWalk:
+    """
+    Bir kategorinin sayfalarından gelen kartları satırlara çevirir
+    (kategori içi URL tekilleştirme + artımlı moddaki "bilinen" serisi).
+    Senkron ve async motor aynı satırları üretsin diye ortak tutuldu.
+    """
+
+    def __init__(self, cat_url: str, known: Optional[set] = None, stop_after: int = KNOWN_STOP):
+        self.cat_url = cat_url
+        self.known = known
+        self.stop_after = stop_after
+        self.rows: List[Dict] = []
+        self.seen_urls = set()
+        self.streak = 0
+        self.state: Dict = {}  # extractors profil/seçici önbelleği
+
+    def feed(self, items: List[Dict]) -> bool:
+        """Sayfanın kartlarını işler; sayfalama durmalıysa False döner."""
+        for item in items:
+            full = item["url"]
+
+            if full and full in self.seen_urls:
+                continue
+            if full:
+                self.seen_urls.add(full)
 
-    for _ in range(50):  # güvenlik amaçlı maksimum sayfa
-        page = soup_get(url)
-        if not page:
-            break
+            if item["name"] or item["price"] or full:
+                self.rows.append(dict(item, source_category=self.cat_url))
 
-        cards = find_product_cards(page)
-        for c in cards:
-            # link
-            link_el = pick_first(BeautifulSoup(str(c), "html.parser"), SELECTORS["link"])
-            href = link_el.get("href").strip() if link_el and link_el.get("href") else ""
-            full = urljoin(url, href) if href else ""
+            if self.known is not None and full:
+                self.streak = self.streak + 1 if full in self.known else 0
+                if self.streak >= self.stop_after:
+                    print(f"[SCRAPE] {self.cat_url}: {self.streak} bilinen ürün art arda, sayfalama durdu.")
+                    return False
+        return True
 
-            if full and full in seen_urls:
-                continue
-            if full:
-                seen_urls.add(full)
-
-            # başlık
-            title_el = pick_first(BeautifulSoup(str(c), "html.parser"), SELECTORS["title"])
-            title = first_text(title_el)
-            # fiyat
-            price_el = pick_first(BeautifulSoup(str(c), "html.parser"), SELECTORS["price"])
-            price_txt = first_text(price_el)
-            price_val = price_to_float(price_txt)
-
-            # sku
-            sku_el = pick_first(BeautifulSoup(str(c), "html.parser"), SELECTORS["sku"])
-            sku = ""
-            if sku_el:
-                if sku_el.has_attr("data-sku"):
-                    sku = sku_el["data-sku"]
-                else:
-                    sku = first_text(sku_el)
-
-            if title or price_val or full:
-                out.append(
-                    {
-                        "sku": sku or "",
-                        "name": title or "",
-                        "price": price_val if price_val is not None else "",
-                        "url": full or "",
-                        "source_category": cat_url,
-                    }
-                )
-
-        nxt = next_page_url(page, url)
+
+def scrape_category(cat_url: str, known: Optional[set] = None, stop_after: int = KNOWN_STOP) -> List[Dict]:
+    # known verilirse (artımlı mod) art arda stop_after bilinen kart görülünce durulur
+    walk = CategoryWalk(cat_url, known, stop_after)
+    url = cat_url
+
+    for _ in range(MAX_PAGES):
+        got = fetch_page(url, walk.state)
+        if not got:
+            break
+        items, nxt = got
+        if not walk.feed(items):
+            break
         if not nxt or nxt == url:
             break
         url = nxt
-        time.sleep(SLEEP_BETWEEN)
 
-    return out
+    return walk.rows
 
 
-def scrape_all(categories: List[str]) -> pd.DataFrame:
-    rows: List[Dict] = []
-    for idx, cu in enumerate(categories, 1):
-        print(f"[SCRAPE] ({idx}/{len(categories)}) {cu}")
-        try:
-            rows.extend(scrape_category(cu))
-        except Exception as e:
-            print(f"[WARN] {cu} hatası: {e}")
-        time.sleep(SLEEP_BETWEEN)
+def load_seen_index(fp: str) -> Dict[str, set]:
+    if not os.path.exists(fp):
+        return {}
+    with open(fp, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {cat: set(urls) for cat, urls in data.items()}
+
+
+def save_seen_index(fp: str, index: Dict[str, set]):
+    data = {cat: sorted(urls) for cat, urls in sorted(index.items())}
+    tmp = fp + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=0)
+    os.replace(tmp, fp)
+
+
+def _scrape_one(idx: int, total: int, cat_url: str, known: Optional[set]) -> List[Dict]:
+    print(f"[SCRAPE] ({idx}/{total}) {cat_url}")
+    try:
+        return scrape_category(cat_url, known)
+    except Exception as e:
+        print(f"[WARN] {cat_url} hatası: {e}")
+        return []
+
+
+def scrape_all(categories: List[str], workers: int = WORKERS,
+               seen_index: Optional[Dict[str, set]] = None) -> pd.DataFrame:
+    # İstekler arası bekleme fetch.THROTTLE içinde (host başına) yapılır.
+    # Sonuçlar her zaman categories.txt sırasıyla birleştirilir; böylece
+    # paralel modda da TRM_PRODUCTS.csv satır sırası koşudan koşuya aynı kalır.
+    # seen_index verilirse artımlı mod: kategori başına bilinenler kullanılır
+    # ve yeni görülen URL'ler index'e eklenir.
+    total = len(categories)
+    jobs = [
+        (i, total, cu, seen_index.get(cu, set()) if seen_index is not None else None)
+        for i, cu in enumerate(categories, 1)
+    ]
+    if workers <= 1:
+        per_cat = [_scrape_one(*a) for a in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            per_cat = list(ex.map(lambda a: _scrape_one(*a), jobs))
+
+    return collect_rows(categories, per_cat, seen_index)
+
+
+def collect_rows(categories: List[str], per_cat: List[List[Dict]],
+                 seen_index: Optional[Dict[str, set]] = None) -> pd.DataFrame:
+    # kategori sonuçlarını sırayla birleştirir, artımlı index'i günceller
+    if seen_index is not None:
+        for cu, chunk in zip(categories, per_cat):
+            seen_index.setdefault(cu, set()).update(r["url"] for r in chunk if r["url"])
+
+    rows: List[Dict] = [r for chunk in per_cat for r in chunk]
     if not rows:
-        return pd.DataFrame(columns=["sku", "name", "price", "url", "source_category"])
+        return pd.DataFrame(columns=["sku", "name", "price", "url", "image", "source_category"])
     return pd.DataFrame(rows)
 
 
 # -------------------------------
 # KAYIT (Excel uyumlu)
 # -------------------------------
-def save_csv(df: pd.DataFrame, path: str):
+def save_csv(df: pd.DataFrame, path: str, formats=()):
     # Excel/TR uyumu için:
     #  - utf-8-sig (BOM'lu UTF-8)
     #  - sep=';' (TR yerelde Excel’in beklediği ayraç)
-    df.to_csv(path, index=False, encoding="utf-8-sig", sep=";")
-
-
-def make_pretty(df: pd.DataFrame) -> pd.DataFrame:
-    # Örnek komisyon/rapor alanları
-    df2 = df.copy()
+    # formats: ek çıktılar (utf8 / parquet / xlsx), bkz. report_writer.py
+    report_writer.write_reports(df, path, formats)
+
+
+def merge_into_existing(df: pd.DataFrame, path: str) -> pd.DataFrame:
+    """
+    Artımlı mod: bu koşuda gelen satırları mevcut ham CSV'ye URL üzerinden
+    işler. Var olan satırlar yerinde güncellenir, yeniler sona eklenir.
+    """
+    if not os.path.exists(path):
+        return df
+    old = pd.read_csv(path, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    if old.empty or "url" not in old.columns:
+        return df
+
+    old_urls = set(old["url"])
+    n_new = int((~df["url"].isin(old_urls)).sum())
+
+    # URL'siz eski satırlar eşlenemez; bu koşunun URL'siz satırları yeterli
+    merged = pd.concat([old[old["url"] != ""], df], ignore_index=True)
+    has_url = merged["url"] != ""
+    keyed = merged[has_url]
+    # her URL'in güncel (son) hali, ilk göründüğü sırada
+    latest = keyed.drop_duplicates("url", keep="last").set_index("url")
+    order = keyed.drop_duplicates("url", keep="first")["url"]
+    out = latest.loc[order].reset_index()
+    out = pd.concat([out, merged[~has_url]], ignore_index=True)
+
+    print(f"[SCRAPE] Artımlı: {len(df) - n_new} güncellendi, {n_new} yeni ürün eklendi.")
+    return out.reindex(columns=list(dict.fromkeys(list(old.columns) + list(df.columns))))
+
+
+def make_pretty(df: pd.DataFrame, rates: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    # Örnek komisyon/rapor alanları. Tam kopya yerine yalnızca gereken
+    # sütunlardan yeni çerçeve; hesaplar sütun bazında (satır satır apply yok).
+    if rates is None:
+        rates = commissions.load_rates()
     # fiyat sayı değilse boş kalsın
-    def _num(x):
-        try:
-            return float(x)
-        except Exception:
-            return None
+    price = pd.to_numeric(df["price"], errors="coerce") if "price" in df else pd.Series(float("nan"), index=df.index)
+    rate = commissions.rates_for(df.get("source_category"), rates, DEFAULT_COMMISSION, df.index)
+    commission = (price.fillna(0) * rate).round(2)
+
+    out = pd.DataFrame(
+        {
+            "sku": df["sku"] if "sku" in df else None,
+            "name": df["name"] if "name" in df else None,
+            "price": price,
+            "commission": commission,
+            "estimated_commission": commission,
+            # TRY kolonu
+            "estimated_commission_try": commission,
+            "url": df["url"] if "url" in df else None,
+            # albüm gönderimi için (post_telegram TELEGRAM_ALBUM=1)
+            "image": df["image"] if "image" in df else None,
+        },
+        index=df.index,
+    )
+    return out
+
 
-    df2["price"] = df2["price"].apply(_num)
-    df2["commission"] = df2["price"].apply(lambda x: round((x or 0) * 0.1, 2))
-    df2["estimated_commission"] = df2["commission"]
-    # TRY kolonu
-    df2["estimated_commission_try"] = df2["estimated_commission"]
-    # Çıktı sütun sırası
-    cols = ["sku", "name", "price", "commission", "estimated_commission", "estimated_commission_try", "url"]
-    return df2.reindex(columns=cols)
+def write_delta(pretty: pd.DataFrame):
+    # ürün deposuna işler, yalnızca değişenleri TRM_DELTA.csv'ye yazar
+    if not PRODUCT_DB:
+        return
+    with ProductStore(PRODUCT_DB) as store:
+        delta = store.diff(pretty)
+    save_csv(delta, OUT_DELTA)
+    counts = delta["change"].value_counts()
+    print(f"[DELTA] yeni {counts.get('new', 0)} | fiyatı düşen {counts.get('price_drop', 0)} | "
+          f"kaldırılan {counts.get('removed', 0)} → {OUT_DELTA}")
 
 
 # -------------------------------
@@ -290,31 +488,73 @@ def make_pretty(df: pd.DataFrame) -> pd.DataFrame:
 # -------------------------------
 def main():
     cats = read_categories(CATEGORIES_FILE)
-    if not cats:
+    if not cats and not (DISCOVERY == "sitemap" and SITEMAP_URL):
         print(f"[SCRAPE] Uyarı: '{CATEGORIES_FILE}' bulunamadı veya boş.")
         return
 
-    df = scrape_all(cats)
+    global CACHE, PARSE_STAGE
+    CACHE = HttpCache(HTTP_CACHE_FILE)
+    if PARSE_PROCS > 0:
+        PARSE_STAGE = ParseStage(PARSE_PROCS)
+
+    seen_index = None
+    if INCREMENTAL and not STREAM and DISCOVERY != "sitemap":
+        seen_index = load_seen_index(SEEN_INDEX_FILE)
+    try:
+        if DISCOVERY == "sitemap":
+            df = scrape_sitemap(SITEMAP_URL or sitemap.default_sitemap(cats[0]))
+        elif STREAM:
+            import scrape_stream
+            streamed = scrape_stream.run(cats, fetch_page)
+        elif BACKEND == "async":
+            import scrape_async
+            df = scrape_async.scrape_all(cats, seen_index=seen_index, cache=CACHE, parse_stage=PARSE_STAGE)
+        else:
+            df = scrape_all(cats, seen_index=seen_index)
+    finally:
+        if PARSE_STAGE is not None:
+            print(f"[PARSE] {PARSE_STAGE.pages} sayfa {PARSE_STAGE.workers} süreçte parse edildi ({PARSE_STAGE.parser}).")
+            PARSE_STAGE.close()
+    print(fetch.summary())
+    if seen_index is not None:
+        save_seen_index(SEEN_INDEX_FILE, seen_index)
+    CACHE.save()
+    print(CACHE.summary())
+
+    if STREAM and DISCOVERY != "sitemap":
+        if not streamed:
+            print("[SCRAPE] Ürün bulunamadı, önceki CSV'lere dokunulmadı.")
+        return
 
     if df.empty:
         print("[SCRAPE] Ürün bulunamadı, mevcut CSV’ler varsa sadece Excel uyumlu formatta yeniden kaydedilecek.")
-        # varsa önceki dosyaları utf-8-sig + ; ile yeniden yaz
-        if os.path.exists(OUT_RAW):
-            pd.read_csv(OUT_RAW, engine="python").to_csv(OUT_RAW, index=False, encoding="utf-8-sig", sep=";")
-        if os.path.exists(OUT_PRETTY):
-            pd.read_csv(OUT_PRETTY, engine="python").to_csv(OUT_PRETTY, index=False, encoding="utf-8-sig", sep=";")
+        # varsa önceki dosyalar utf-8-sig + ; değilse yeniden yazılır (zaten öyleyse dokunulmaz)
+        for path in (OUT_RAW, OUT_PRETTY):
+            if report_writer.normalize_file(path):
+                print(f"[SCRAPE] {path} Excel biçimine çevrildi.")
         return
 
     # KAYIT
     print(f"[SCRAPE] {len(df)} ürün bulundu, dosyalar yazılıyor...")
+    # URL varyantları ve yakın kopyalar SKU almadan önce atılır
+    df = dedupe.dedupe_frame(df)
+    # boş SKU'lar kalıcı indeksten: post_telegram SKU ile tekilleştirir
+    with SkuIndex(SKU_DB) as idx:
+        df["sku"] = fill_skus(df, idx)
+    if INCREMENTAL:
+        df = merge_into_existing(df, OUT_RAW)
     save_csv(df, OUT_RAW)
 
     pretty = make_pretty(df)
-    save_csv(pretty, OUT_PRETTY)
+    save_csv(pretty, OUT_PRETTY, report_writer.FORMATS)
+
+    write_delta(pretty)
 
     print("[SCRAPE] Kayıt tamamlandı:")
     print(f" - {OUT_RAW}")
     print(f" - {OUT_PRETTY}")
+    if PRODUCT_DB:
+        print(f" - {OUT_DELTA}")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,23 @@
-import re, os, csv, time, json
+import re, os, csv, time
 from urllib.parse import urljoin
-import requests
-from bs4 import BeautifulSoup
+
+import dedupe
+import extractors
+import fetch
+import prices
+import sitemap
+from urls import canonical_url
 
 BASE = "https://trendurunlermarket.com"
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; TRMBot/1.0)"}
 
 CATEGORIES_FILE = "trm_cloud/categories.txt"
 OUT_PRODUCTS = "TRM_PRODUCTS.csv"
-STATE_FILE = "trm_cloud/_posted_state.json"   # gönderilenleri tutar
+PROFILE = "trm_site"  # extractors.PROFILES
+MAX_PAGE_ERRORS = 2   # art arda bu kadar sayfa alınamazsa kategori bırakılır
+# "sitemap": kategori sayfalama yerine sitemap.xml + ürün sayfası JSON-LD (sitemap.py)
+DISCOVERY = os.getenv("TRM_DISCOVERY", "categories").strip().lower()
+SITEMAP_URL = os.getenv("TRM_SITEMAP", "") or sitemap.default_sitemap(BASE)
 
 def read_categories():
     if not os.path.exists(CATEGORIES_FILE):
@@ -20,57 +29,33 @@ def read_categories():
     return cats
 
 def get_soup(url):
-    r = requests.get(url, headers=HEADERS, timeout=25)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml")
+    # bağlantı havuzu + tekrar/backoff fetch katmanında
+    return fetch.get_soup(url, "lxml", headers=HEADERS, timeout=25)
+
+def _abs(u):
+    return urljoin(BASE, u) if u and u.startswith("/") else u
 
-def parse_list_items(soup):
+def parse_list_items(soup, state=None):
     """
-    Site teması değişse bile yaygın seçicilerle deneriz.
+    Seçiciler extractors kaydında ("trm_site" profili); tema değişirse diğer
+    profiller de denenir. state verilirse kategori boyunca tespit edilen
+    profil/seçiciler tekrar kullanılır.
     Döndürdüğü her dict: {name, price, url, image}
     """
+    items, _ = _extract(soup, {} if state is None else state)
+    return items
+
+def _extract(soup, state):
+    raws, nxt = extractors.extract_page(soup, state, prefer=PROFILE)
     items = []
-    # 1) Kartlar
-    cards = soup.select(".product, .product-card, .productItem, .product-item, li.product, .col-product")
-    if not cards:
-        # Fallback: linklerde ürün sayfaları
-        cards = soup.select("a[href*='/urun-'], a[href*='/p-'], a[href*='/Product-']")
-    for c in cards:
-        # URL
-        a = c.select_one("a[href]")
-        href = a["href"] if a else None
-        if href and href.startswith("/"):
-            href = urljoin(BASE, href)
-        # İsim
-        name = None
-        for sel in ["[itemprop='name']", ".product-name", ".name", "h3", "h2", "h4", "span"]:
-            el = c.select_one(sel)
-            if el and el.get_text(strip=True):
-                name = el.get_text(" ", strip=True)
-                break
-        # Fiyat
-        price = None
-        price_candidates = c.select(".price, .product-price, [itemprop='price'], .current, .new-price, .urunFiyat, .prc")
-        if price_candidates:
-            price = price_candidates[0].get_text(" ", strip=True)
-        else:
-            txt = c.get_text(" ", strip=True)
-            m = re.search(r"(\d[\d\.]*,\d{2}|\d[\d\.]*)\s*TL", txt, re.I)
-            if m: price = m.group(0)
-        # Resim
-        img = None
-        imgel = c.select_one("img[src]")
-        if imgel:
-            img = imgel.get("data-src") or imgel.get("src")
-            if img and img.startswith("/"):
-                img = urljoin(BASE, img)
+    for r in raws:
+        href, name = _abs(r["url"]), r["name"]
         if href and name:
-            items.append({"name": name, "price": price or "", "url": href, "image": img or ""})
-    return items
+            items.append({"name": name, "price": r["price"] or "", "url": href, "image": _abs(r["image"]) or ""})
+    return items, nxt
 
 def has_next_page(soup):
-    nxt = soup.select_one("a[rel='next'], .pagination a.next, .pages a.next, a[aria-label='Next']")
-    return bool(nxt)
+    return extractors.find_next(soup, extractors.PROFILES[PROFILE]) is not None
 
 def build_page_url(cat_url, page):
     # yaygın pagination: ?pg=2, ?page=2, /?PAGEN_2=2, /page/2
@@ -86,30 +71,68 @@ def build_page_url(cat_url, page):
 
 def scrape_category(cat_url, limit_pages=50, sleep=1.0):
     page = 1
+    errors = 0
+    state = {}  # extractors profil/seçici önbelleği
     all_items = []
     while page <= limit_pages:
         url = build_page_url(cat_url, page)
         print(f"[{page}] {url}")
         try:
             soup = get_soup(url)
-        except Exception as e:
+        except fetch.BudgetExhausted as e:
             print(f"[WARN] {e}")
             break
-        items = parse_list_items(soup)
+        except fetch.FetchError as e:
+            # tekrarlar tükendi; tek sayfa yüzünden tüm kategoriyi bırakma
+            print(f"[WARN] {e}")
+            errors += 1
+            if errors >= MAX_PAGE_ERRORS:
+                break
+            page += 1
+            continue
+        errors = 0
+        items, nxt = _extract(soup, state)
         if not items:
             # başka seçicilerle deneyip yine yoksa dur
             print("[INFO] Ürün bulunamadı; durduruldu.")
             break
         all_items.extend(items)
-        if not has_next_page(soup):
+        if nxt is None:
             break
         page += 1
         time.sleep(sleep)
     return all_items
 
+def scrape_sitemap(src, sleep=1.0):
+    # ürün sayfası başına tek istek; alanlar JSON-LD/itemprop'tan, yoksa seçicilerden
+    items = []
+    try:
+        for url in sitemap.iter_product_urls(src):
+            try:
+                r = fetch.get(url, headers=HEADERS, timeout=25)
+            except fetch.BudgetExhausted as e:
+                print(f"[WARN] {e}")
+                break
+            except fetch.FetchError as e:
+                print(f"[WARN] {e}")
+                continue
+            raw, _ = sitemap.extract_product(r.content, url, "lxml", fetch.declared_encoding(r), PROFILE)
+            if raw and raw["name"]:
+                items.append({"name": raw["name"], "price": raw["price"] or "", "url": raw["url"],
+                              "image": _abs(raw["image"]) or ""})
+            time.sleep(sleep)
+    except sitemap.READ_ERRORS as e:
+        print(f"[WARN] sitemap okunamadı: {e}")
+    return items
+
 def main():
-    cats = read_categories()
-    all_rows = []
+    if DISCOVERY == "sitemap":
+        all_rows = scrape_sitemap(SITEMAP_URL)
+        print(f"[OK] {SITEMAP_URL} → {len(all_rows)} ürün")
+        cats = []
+    else:
+        cats = read_categories()
+        all_rows = []
     for cu in cats:
         try:
             rows = scrape_category(cu)
@@ -118,14 +141,18 @@ def main():
         except Exception as e:
             print(f"[ERR] {cu}: {e}")
 
-    # uniq URL
+    # uniq URL (kanonik: izleme parametresi / sondaki "/" farkı aynı ürün)
     seen = set()
     uniq = []
     for r in all_rows:
-        if r["url"] in seen: 
+        key = canonical_url(r["url"]) or r["url"]
+        if key in seen:
             continue
-        seen.add(r["url"])
+        seen.add(key)
         uniq.append(r)
+    # yakın kopyalar (TRM_NEAR_DUP > 0 ise; aynı fiyat, neredeyse aynı ad) → ilk görülen kalır
+    roots = dedupe.near_duplicate_roots([r["name"] for r in uniq], [prices.parse_price(r["price"]) for r in uniq])
+    uniq = [r for i, r in enumerate(uniq) if roots[i] == i]
 
     with open(OUT_PRODUCTS, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=["name","price","url","image"])
@@ -133,11 +160,8 @@ def main():
         w.writerows(uniq)
 
     print(f"\n✓ TOPLAM: {len(uniq)} ürün yazıldı → {OUT_PRODUCTS}")
-
-    # state dosyası yoksa üret (telegram için ilk koşuda hepsini “gönderilmedi” sayalım)
-    if not os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump({"posted_urls": []}, f)
+    print(fetch.summary())
+    # gönderim durumu post_store.py'de (TELEGRAM_POSTS.sqlite) tutulur
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,256 @@
+# trm_cloud/scrape_stream.py
+# -*- coding: utf-8 -*-
+"""
+Akışlı (bellek sınırlı) tarama → rapor hattı
+--------------------------------------------
+- Her sayfanın kartları tek tek akar: CategoryWalk → kanonik URL tekilleştirme
+  → SKU indeksi → make_pretty → TRM_PRODUCTS.csv / TRM_REPORT_PRETTY.csv
+  sonuna ekleme (utf-8-sig, ';'). Bellekte katalog değil, o anki sayfa ve
+  görülen URL kümesi tutulur.
+- Dosyalar önce "<ad>.part" olarak yazılır; her TRM_STREAM_FLUSH sayfada
+  flush + fsync edilir ve checkpoint (TRM_STREAM_STATE.json) güncellenir:
+  kategori sırası, sonraki sayfa URL'i, profil durumu, dosya boyları.
+- Kesilen koşu aynı komutla yeniden başlatılırsa .part dosyaları
+  checkpoint'teki boya kırpılır (yarım satır kalmaz) ve son tamamlanan
+  sayfadan devam edilir. categories.txt değiştiyse baştan başlanır.
+- Bitince .part dosyaları asıl adlarına taşınır, checkpoint silinir; delta
+  (TRM_PRODUCT_DB) yazılan rapordan hesaplanır.
+
+Seçim:
+    TRM_STREAM=1 python trm_cloud/scrape_products.py
+
+Sınırlar: kategoriler sırayla taranır (TRM_WORKERS yok sayılır); yakın kopya
+aşaması (dedupe.py) tüm kataloğu gerektirdiği için yalnızca kanonik URL
+tekilleştirmesi yapılır; artımlı birleştirme (TRM_INCREMENTAL) uygulanmaz.
+"""
+
+import codecs
+import csv
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import commissions
+import report_writer
+from scrape_products import (
+    MAX_PAGES,
+    OUT_PRETTY,
+    OUT_RAW,
+    ROOT_DIR,
+    SKU_DB,
+    CategoryWalk,
+    make_pretty,
+    write_delta,
+)
+from sku_index import SkuIndex, fill_skus
+from urls import canonical_url
+
+STATE_FILE = os.getenv("TRM_STREAM_STATE", os.path.join(ROOT_DIR, "TRM_STREAM_STATE.json"))
+FLUSH_PAGES = max(1, int(os.getenv("TRM_STREAM_FLUSH", "1") or "1"))  # kaç sayfada bir flush + checkpoint
+RAW_COLS = ["sku", "name", "price", "url", "image", "source_category"]
+
+FetchPage = Callable[[str, Dict], Optional[Tuple[List[Dict], Optional[str]]]]
+
+
+# -------------------------------
+# CHECKPOINT
+# -------------------------------
+def load_state(fp: str, categories: List[str]) -> Optional[Dict]:
+    """Aynı kategori listesi için kalmış checkpoint; yoksa / uyuşmuyorsa None."""
+    if not os.path.exists(fp):
+        return None
+    try:
+        with open(fp, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("categories") != categories:
+        print("[STREAM] categories.txt değişmiş, checkpoint yok sayıldı.")
+        return None
+    return state
+
+
+def save_state(fp: str, state: Dict):
+    tmp = fp + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, fp)
+
+
+# -------------------------------
+# ÇIKTI
+# -------------------------------
+class ReportStream:
+    """
+    Excel biçimli CSV'lere ekleme yapan yazıcılar (<yol>.part). sizes verilirse
+    dosyalar o boya kırpılıp kaldığı yerden devam edilir.
+    """
+
+    def __init__(self, paths: Dict[str, str], sizes: Optional[Dict[str, int]] = None):
+        self.paths = paths
+        self.files = {}
+        for key, path in paths.items():
+            part = path + ".part"
+            size = (sizes or {}).get(key)
+            if size is not None and os.path.exists(part):
+                f = open(part, "r+b")
+                f.truncate(size)
+                f.seek(size)
+            else:
+                f = open(part, "wb")
+            self.files[key] = f
+
+    def write(self, key: str, df: pd.DataFrame):
+        f = self.files[key]
+        header = f.tell() == 0
+        data = df.to_csv(index=False, header=header, sep=report_writer.EXCEL_SEP)
+        f.write((codecs.BOM_UTF8 if header else b"") + data.encode("utf-8"))
+
+    def flush(self) -> Dict[str, int]:
+        """Diske yazar; checkpoint'e girecek dosya boylarını döner."""
+        sizes = {}
+        for key, f in self.files.items():
+            f.flush()
+            os.fsync(f.fileno())
+            sizes[key] = f.tell()
+        return sizes
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def commit(self, columns: Dict[str, List[str]]):
+        """Hiç satır yazılmamış dosyaya başlık koyar, .part → asıl ad."""
+        for key, f in self.files.items():
+            if f.tell() == 0:
+                self.write(key, pd.DataFrame(columns=columns[key]))
+        self.close()
+        for path in self.paths.values():
+            os.replace(path + ".part", path)
+
+    def discard(self):
+        self.close()
+        for path in self.paths.values():
+            if os.path.exists(path + ".part"):
+                os.remove(path + ".part")
+
+
+def seen_in(path: str) -> set:
+    """Yarım kalmış ham .part dosyasındaki kanonik URL'ler (devam ederken)."""
+    seen = set()
+    if not os.path.exists(path):
+        return seen
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f, delimiter=report_writer.EXCEL_SEP):
+            key = canonical_url(row.get("url") or "")
+            if key:
+                seen.add(key)
+    return seen
+
+
+# -------------------------------
+# AKIŞ
+# -------------------------------
+def iter_pages(cat_url: str, fetch_page: FetchPage, start_url: Optional[str] = None,
+               state: Optional[Dict] = None, pages: int = 0):
+    """
+    Kategorinin sayfaları: (sayfanın satırları, sonraki URL, profil durumu) üretir.
+    Sonraki URL None ise kategori bitti. Checkpoint'ten devam için start_url /
+    state / pages verilebilir.
+    """
+    walk = CategoryWalk(cat_url)
+    if state:
+        walk.state.update(state)
+    url = start_url or cat_url
+    while pages < MAX_PAGES:
+        got = fetch_page(url, walk.state)
+        if not got:
+            return
+        items, nxt = got
+        walk.rows = []
+        walk.feed(items)
+        pages += 1
+        done = not nxt or nxt == url or pages >= MAX_PAGES
+        yield walk.rows, (None if done else nxt), walk.state
+        if done:
+            return
+        url = nxt
+
+
+def run(categories: List[str], fetch_page: FetchPage, state_file: str = STATE_FILE) -> int:
+    """
+    Kategorileri akışla tarar, iki raporu yazar. Yazılan ürün sayısını döner
+    (0 ise önceki dosyalara dokunulmaz).
+    """
+    paths = {"raw": OUT_RAW, "pretty": OUT_PRETTY}
+    ck = load_state(state_file, categories)
+    if ck:
+        print(f"[STREAM] Checkpoint: {ck['rows']} ürün yazılmış, kategori {ck['cat'] + 1}/{len(categories)} "
+              f"sayfa {ck['pages']} sonrasından devam.")
+        out = ReportStream(paths, ck["sizes"])
+        seen = seen_in(OUT_RAW + ".part")
+    else:
+        ck = {"categories": categories, "cat": 0, "url": None, "pages": 0, "state": {}, "rows": 0, "sizes": {}}
+        out = ReportStream(paths)
+        seen = set()
+
+    rates = commissions.load_rates()
+    total = len(categories)
+    since_flush = 0
+
+    def checkpoint():
+        ck["sizes"] = out.flush()
+        save_state(state_file, ck)
+
+    with SkuIndex(SKU_DB) as idx:
+        for ci in range(ck["cat"], total):
+            cat_url = categories[ci]
+            print(f"[SCRAPE] ({ci + 1}/{total}) {cat_url}")
+            resume = ci == ck["cat"] and ck["url"]
+            pages = iter_pages(cat_url, fetch_page,
+                               start_url=ck["url"] if resume else None,
+                               state=ck["state"] if resume else None,
+                               pages=ck["pages"] if resume else 0)
+            try:
+                for rows, nxt, walk_state in pages:
+                    keep = []
+                    for r in rows:
+                        key = canonical_url(r["url"])
+                        if key and key in seen:
+                            continue
+                        if key:
+                            seen.add(key)
+                        keep.append(r)
+                    if keep:
+                        df = pd.DataFrame(keep, columns=RAW_COLS)
+                        df["sku"] = fill_skus(df, idx)
+                        out.write("raw", df)
+                        out.write("pretty", make_pretty(df, rates))
+                        ck["rows"] += len(df)
+
+                    ck["pages"] += 1
+                    ck["url"], ck["state"] = nxt, dict(walk_state)
+                    since_flush += 1
+                    if since_flush >= FLUSH_PAGES:
+                        checkpoint()
+                        since_flush = 0
+            except Exception as e:
+                print(f"[WARN] {cat_url} hatası: {e}")
+
+            # kategori bitti: sonraki kategorinin başından
+            ck.update(cat=ci + 1, url=None, pages=0, state={})
+            checkpoint()
+            since_flush = 0
+
+    n = ck["rows"]
+    if not n:
+        out.discard()
+    else:
+        out.commit({"raw": RAW_COLS, "pretty": list(make_pretty(pd.DataFrame(columns=RAW_COLS), rates).columns)})
+        print(f"[STREAM] {n} ürün yazıldı → {OUT_RAW}, {OUT_PRETTY}")
+        # delta tüm kataloğu ister: biten rapor bir kez okunur
+        write_delta(report_writer.read_table(OUT_PRETTY))
+    os.remove(state_file)
+    return n
@@ -0,0 +1,221 @@
+# trm_cloud/sitemap.py
+# -*- coding: utf-8 -*-
+"""
+Sitemap ile ürün keşfi + ürün sayfasından hızlı alan çıkarma
+-----------------------------------------------------------
+- sitemap.xml (ve sitemap index → alt sitemap'ler, .gz dahil) ElementTree
+  iterparse ile okunur. Uzak dosya indirilmeden yanıt akışından (r.raw)
+  parse edilir; işlenen <url> kökten ayrılır, XML ağacı büyümez.
+  Yalnızca ürün desenine uyan adresler döner (TRM_SITEMAP_MATCH).
+- Ürün sayfası için sıra:
+    1) JSON-LD (<script type="application/ld+json"> içindeki Product):
+       ham baytta regex + json.loads, HTML ağacı hiç kurulmaz
+    2) schema.org microdata (itemprop="name/price/sku/image")
+    3) extractors seçici zinciri (tema profili; kart yerine tüm sayfa)
+- Yerel dosya yolları da kabul edilir (fixtures/ ile test edilebilir).
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+import extractors
+import fetch
+
+# ürün sayfası deseni (varsayılan: /urun/... ya da ...-P123)
+PRODUCT_MATCH = re.compile(os.getenv("TRM_SITEMAP_MATCH", r"/urun/|-P\d+/?$") or r".")
+MAX_SITEMAPS = int(os.getenv("TRM_SITEMAP_MAX", "200") or "200")  # index'ten okunacak en fazla alt sitemap
+
+_LD_RE = re.compile(rb"<script[^>]+application/ld\+json[^>]*>(.*?)</script\s*>", re.S | re.I)
+_PRODUCT_TYPE = re.compile(r"schema\.org/Product$", re.I)
+# sitemap okunurken yakalanan hatalar (indirme / bozuk XML / dosya)
+READ_ERRORS = (fetch.FetchError, ET.ParseError, OSError)
+
+
+# -------------------------------
+# SITEMAP
+# -------------------------------
+def _is_remote(src: str) -> bool:
+    return src.startswith(("http://", "https://"))
+
+
+@contextmanager
+def open_source(src: str, headers: Optional[Dict[str, str]] = None):
+    """
+    URL ise fetch ile akış olarak açar (gövde belleğe alınmaz), değilse yerel
+    dosya; .gz içerik açılarak okunur.
+    """
+    r = None
+    if _is_remote(src):
+        r = fetch.get(src, headers=headers, stream=True)
+        r.raw.decode_content = True  # Content-Encoding: gzip şeffaf açılır
+        r.raw.auto_close = False     # gövde bitince kapanmasın; BufferedReader tamponu okunabilsin
+        stream = io.BufferedReader(r.raw)
+    else:
+        stream = open(src, "rb")
+    try:
+        if stream.peek(2)[:2] == b"\x1f\x8b":
+            with gzip.GzipFile(fileobj=stream) as gz:
+                yield gz
+        else:
+            yield stream
+    finally:
+        stream.close()
+        if r is not None:
+            r.close()
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap(src: str, opener: Callable = open_source, _depth: int = 0) -> Iterator[Tuple[str, str]]:
+    """
+    (loc, lastmod) çiftleri. sitemapindex ise alt sitemap'ler sırayla açılır;
+    yerel index'teki göreli loc index dosyasının klasörüne göre çözülür.
+    """
+    children = []
+    with opener(src) as f:
+        loc = lastmod = ""
+        root = None
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = el
+                continue
+            tag = _local(el.tag)
+            if tag == "loc":
+                loc = (el.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = (el.text or "").strip()
+            elif tag == "url":
+                if loc:
+                    yield loc, lastmod
+                loc = lastmod = ""
+                root.clear()  # işlenen <url> kökten ayrılır (el.clear() tek başına yetmez)
+            elif tag == "sitemap":
+                if loc:
+                    children.append(loc)
+                loc = lastmod = ""
+                root.clear()
+
+    if _depth >= 2:
+        return
+    for child in children[:MAX_SITEMAPS]:
+        if not _is_remote(child) and not _is_remote(src):
+            child = os.path.join(os.path.dirname(src), child)
+        try:
+            yield from iter_sitemap(child, opener, _depth + 1)
+        except READ_ERRORS as e:
+            print(f"[WARN] sitemap {child}: {e}")
+
+
+def iter_product_urls(src: str, opener: Callable = open_source) -> Iterator[str]:
+    seen = set()
+    for loc, _ in iter_sitemap(src, opener):
+        if loc in seen or not PRODUCT_MATCH.search(loc):
+            continue
+        seen.add(loc)
+        yield loc
+
+
+def default_sitemap(url: str) -> str:
+    # kategori / site adresinden kök sitemap.xml
+    return urljoin(url, "/sitemap.xml")
+
+
+# -------------------------------
+# ÜRÜN SAYFASI
+# -------------------------------
+def _ld_products(node) -> Iterator[Dict]:
+    if isinstance(node, list):
+        for it in node:
+            yield from _ld_products(it)
+    elif isinstance(node, dict):
+        kind = node.get("@type")
+        kinds = kind if isinstance(kind, list) else [kind]
+        if "Product" in kinds:
+            yield node
+        if "@graph" in node:
+            yield from _ld_products(node["@graph"])
+
+
+def _first(v):
+    if isinstance(v, list):
+        v = v[0] if v else ""
+    if isinstance(v, dict):
+        v = v.get("url") or v.get("contentUrl") or v.get("name") or ""
+    return "" if v is None else str(v).strip()
+
+
+def from_jsonld(content: bytes, encoding: Optional[str] = None) -> Optional[Dict[str, str]]:
+    for m in _LD_RE.finditer(content):
+        try:
+            data = json.loads(m.group(1).decode(encoding or "utf-8", "replace"))
+        except ValueError:
+            continue
+        for p in _ld_products(data):
+            offers = p.get("offers") or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            price = (offers.get("price") or offers.get("lowPrice")) if isinstance(offers, dict) else ""
+            name = _first(p.get("name"))
+            if not name:
+                continue
+            return {
+                "sku": _first(p.get("sku") or p.get("mpn") or p.get("productID")),
+                "name": name,
+                "price": _first(price),
+                "url": _first(p.get("url") or (offers.get("url") if isinstance(offers, dict) else "")),
+                "image": _first(p.get("image")),
+            }
+    return None
+
+
+def _prop(scope, name: str) -> str:
+    el = scope.find(attrs={"itemprop": name})
+    if el is None:
+        return ""
+    for attr in ("content", "src", "href"):
+        if el.get(attr):
+            return el[attr].strip()
+    return " ".join(el.get_text(" ", strip=True).split())
+
+
+def from_itemprop(page: BeautifulSoup) -> Optional[Dict[str, str]]:
+    scope = page.find(attrs={"itemtype": _PRODUCT_TYPE})
+    if scope is None:
+        return None
+    name = _prop(scope, "name")
+    if not name:
+        return None
+    return {"sku": _prop(scope, "sku") or _prop(scope, "mpn"), "name": name, "price": _prop(scope, "price"),
+            "url": _prop(scope, "url"), "image": _prop(scope, "image")}
+
+
+def extract_product(content: bytes, url: str, parser: str = "html.parser", encoding: Optional[str] = None,
+                    profile: str = "trm_products") -> Tuple[Optional[Dict[str, str]], str]:
+    """
+    Ürün sayfasının ham alanları (extractors.extract_card ile aynı anahtarlar)
+    ve kaynağı: "jsonld" | "itemprop" | "selectors". Ürün yoksa (None, "").
+    """
+    raw, source = from_jsonld(content, encoding), "jsonld"
+    if raw is None:
+        page = BeautifulSoup(content, parser, from_encoding=encoding)
+        raw, source = from_itemprop(page), "itemprop"
+        if raw is None:
+            raw, source = extractors.extract_card(page, extractors.PROFILES[profile]), "selectors"
+            # sayfadaki ilk link (menü vb.) ürünün kendisi değildir
+            raw["url"] = ""
+            if not raw["name"]:
+                return None, ""
+    raw["url"] = urljoin(url, raw["url"]) if raw["url"] else url
+    return raw, source
@@ -0,0 +1,108 @@
+# trm_cloud/sku_index.py
+# -*- coding: utf-8 -*-
+"""
+Kalıcı SKU indeksi (SQLite, WAL)
+--------------------------------
+- Kanonik ürün URL'i → kısa, kalıcı kimlik: "TRM~" + base36(sıra no).
+  Aynı ürün her koşuda aynı SKU'yu alır; katalog büyüdükçe çakışma olmaz.
+  "TRM~" öneki sitenin verdiği TRM- kodlarıyla hiçbir zaman çakışmaz.
+- URL'i olmayan satırlar ad üzerinden anahtarlanır ("name:<ad>").
+- Toplu atama: bir taramanın tüm anahtarları parça parça tek sorguyla aranır,
+  eksikler tek executemany ile eklenir.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from urls import canonical_url
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sku_index (
+    id  INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE
+);
+"""
+_IN_CHUNK = 500
+_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+PREFIX = "TRM~"  # site SKU'ları "~" içermez
+
+
+def base36(n: int) -> str:
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if not n:
+            return out
+
+
+class SkuIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            q = "SELECT key, id FROM sku_index WHERE key IN (%s)" % ",".join("?" * len(chunk))
+            found.update(self.db.execute(q, chunk))
+        return found
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Anahtar → SKU; yeni anahtarlar sırayla numaralanır."""
+        keys = [k for k in dict.fromkeys(keys) if k]
+        ids = self._lookup(keys)
+        missing = [k for k in keys if k not in ids]
+        if missing:
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO sku_index (key) VALUES (?)", ((k,) for k in missing))
+            ids.update(self._lookup(missing))
+        return {k: PREFIX + base36(i) for k, i in ids.items()}
+
+    def get(self, url: str) -> str:
+        row = self.db.execute("SELECT id FROM sku_index WHERE key = ?", (canonical_url(url),)).fetchone()
+        return PREFIX + base36(row[0]) if row else ""
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """Satır başına indeks anahtarı: kanonik URL, yoksa "name:<ad>"."""
+    url = df["url"].fillna("").astype(str) if "url" in df else pd.Series("", index=df.index)
+    name = df["name"].fillna("").astype(str).str.strip() if "name" in df else pd.Series("", index=df.index)
+    canon = url.map(canonical_url)
+    return canon.where(canon != "", ("name:" + name).where(name != "", ""))
+
+
+def fill_skus(df: pd.DataFrame, index: SkuIndex) -> pd.Series:
+    """
+    Boş SKU'ları indeksten doldurur; dolu olanlara dokunmaz. Atanan SKU
+    taramadaki bir site SKU'suyla aynıysa satır boş kalır (uyarı basılır).
+    """
+    sku = df["sku"].fillna("").astype(str).str.strip() if "sku" in df else pd.Series("", index=df.index)
+    empty = sku == ""
+    if not empty.any():
+        return sku
+    keys = row_keys(df[empty])
+    ids = index.assign(keys)
+    assigned = keys.map(ids).fillna("")
+    clash = assigned.isin(set(sku[~empty])) & (assigned != "")
+    if clash.any():
+        print(f"[SKU] {int(clash.sum())} atanan SKU site SKU'suyla çakıştı, boş bırakıldı: "
+              + ", ".join(assigned[clash].head(5)))
+        assigned[clash] = ""
+    sku[empty] = assigned
+    return sku
@@ -0,0 +1,6 @@
+# trm_cloud/tests/conftest.py
+# Modüller trm_cloud içinde düz import ediliyor (import prices, import fetch ...)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+# trm_cloud/tests/test_dedupe.py
+# -*- coding: utf-8 -*-
+"""
+Tekilleştirme: varsayılan yalnızca kanonik URL; beden / renk varyantları
+(aynı fiyat, farklı URL) ham katalogda kalır.
+"""
+
+import pandas as pd
+
+import dedupe
+
+VARIANTS = pd.DataFrame({
+    "sku": ["", "", "", ""],
+    "name": [
+        "Koton Slim Fit Tişört Siyah Beden M",
+        "Koton Slim Fit Tişört Siyah Beden L",
+        "Koton Slim Fit Tişört Beyaz Beden M",
+        "Koton Slim Fit Tişört Siyah Beden M",
+    ],
+    "price": [199.9, 199.9, 199.9, 199.9],
+    "url": [
+        "https://www.example.com/urun/tisort-siyah-m",
+        "https://www.example.com/urun/tisort-siyah-l",
+        "https://www.example.com/urun/tisort-beyaz-m",
+        "https://example.com/urun/tisort-siyah-m/?utm_source=tg",
+    ],
+})
+
+
+def test_near_dup_is_off_by_default():
+    assert dedupe.THRESHOLD == 0
+
+
+def test_variants_survive_default_dedupe():
+    out = dedupe.dedupe_frame(VARIANTS)
+    # yalnızca izleme parametreli / www'suz URL kopyası düşer
+    assert out["url"].tolist() == VARIANTS["url"].tolist()[:3]
+
+
+def test_variants_survive_default_roots():
+    names = VARIANTS["name"].tolist()[:3]
+    assert dedupe.near_duplicate_roots(names, [199.9] * 3) == [0, 1, 2]
+
+
+def test_explicit_threshold_still_merges():
+    # isteğe bağlı aşama açıkça istenirse aynı fiyatlı yakın adlar birleşir
+    names = VARIANTS["name"].tolist()[:2]
+    assert dedupe.near_duplicate_roots(names, [199.9] * 2, threshold=0.9) == [0, 0]
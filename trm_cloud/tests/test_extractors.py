@@ -0,0 +1,51 @@
+# trm_cloud/tests/test_extractors.py
+# -*- coding: utf-8 -*-
+"""
+Seçici zincirleri: her kartta öncelik sırası korunur (ilk eşleşen kazanır),
+önceki kartın isabet ettiği seçici sonraki kartı etkilemez.
+"""
+
+from bs4 import BeautifulSoup
+
+import extractors
+
+PAGE = """
+<div class="product-card">
+  <h3><a href="/p/1">One Name</a></h3>
+  <span class="price">100 TL</span>
+</div>
+<div class="product-card">
+  <a href="/kampanya">Brand</a>
+  <a class="product-link" href="/p/2">Two</a>
+  <h3><a href="/p/2">Brand</a></h3>
+  <span class="product-title">Two Full Name</span>
+  <span class="price">200 TL</span>
+</div>
+"""
+
+
+def _items(html: str):
+    state = {}
+    items, _ = extractors.extract_page(BeautifulSoup(html, "html.parser"), state, prefer="trm_products")
+    return items, state
+
+
+def test_later_card_uses_higher_priority_selector():
+    items, state = _items(PAGE)
+    assert state["profile"] == "trm_products"
+    # ilk kart "h3 a" ile, ikincisi önceki ".product-title" ile
+    assert [it["name"] for it in items] == ["One Name", "Two Full Name"]
+
+
+def test_generic_link_fallback_is_not_sticky():
+    items, _ = _items(PAGE)
+    # ilk kartta yalnızca genel "a" eşleşir; ikinci kartta a.product-link kazanır
+    assert [it["url"] for it in items] == ["/p/1", "/p/2"]
+
+
+def test_state_survives_pages_without_changing_priority():
+    _, state = _items(PAGE)
+    page2 = BeautifulSoup(PAGE.replace("/p/", "/q/"), "html.parser")
+    items, _ = extractors.extract_page(page2, state, prefer="trm_products")
+    assert [it["name"] for it in items] == ["One Name", "Two Full Name"]
+    assert [it["url"] for it in items] == ["/q/1", "/q/2"]
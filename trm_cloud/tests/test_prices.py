@@ -0,0 +1,151 @@
+# trm_cloud/tests/test_prices.py
+# -*- coding: utf-8 -*-
+"""
+Fiyat normalizasyonu: skaler ve vektörel yol ile üç çağrı yeri aynı sonucu verir
+- scrape_products.price_to_float  (prices.parse_price)
+- main.read_products              (prices.parse_price_series, CSV'den)
+- scrape_site.parse_list_items    (extractors "trm_site" profili → ham metin)
+
+Koşum:
+    pip install -r trm_cloud/requirements-dev.txt
+    python -m pytest -q trm_cloud/tests
+"""
+
+import math
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+import main
+import prices
+import scrape_site
+from scrape_products import price_to_float
+
+
+# -------------------------------
+# ÜRETEÇLER
+# -------------------------------
+def _group(n: int, sep: str) -> str:
+    s = str(n)
+    if not sep:
+        return s
+    parts = []
+    while len(s) > 3:
+        parts.insert(0, s[-3:])
+        s = s[:-3]
+    return sep.join([s] + parts)
+
+
+@st.composite
+def tr_prices(draw):
+    """(metin, kuruş) — "1.299,90", "1299,90 TL", "₺12.500", "1.234.567" ..."""
+    lira = draw(st.integers(min_value=0, max_value=10 ** 8))
+    kurus = draw(st.integers(min_value=0, max_value=99))
+    body = _group(lira, draw(st.sampled_from(["", "."])))
+    if draw(st.booleans()):
+        body += f",{kurus:02d}"
+    else:
+        kurus = 0
+    prefix = draw(st.sampled_from(["", "₺", "₺ "]))
+    suffix = draw(st.sampled_from(["", " TL", "TL", " tl"]))
+    return prefix + body + suffix, lira * 100 + kurus
+
+
+# ayırıcı ağırlıklı serbest metin: hem geçerli hem bozuk biçimler
+price_like = st.text(alphabet="0123456789.,  TL₺abc-", max_size=20)
+
+
+def _same(a, b) -> bool:
+    a = None if a is None or (isinstance(a, float) and math.isnan(a)) else a
+    b = None if b is None or (isinstance(b, float) and math.isnan(b)) else b
+    if a is None or b is None:
+        return a is b
+    return a == pytest.approx(b, rel=1e-12, abs=1e-9)
+
+
+# -------------------------------
+# SABİT ÖRNEKLER (prices.py belgesindeki kurallar)
+# -------------------------------
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1.299", 1299.0),         # tek nokta + 3 hane → binlik
+        ("199.90", 199.9),         # tek nokta + 2 hane → ondalık
+        ("1.299,90 TL", 1299.9),   # ikisi de var → en sağdaki ondalık
+        ("0.125", 0.125),          # sıfırla başlayan tam kısım → ondalık
+        ("12,500", 12.5),          # tek virgül → ondalık
+        ("1,299.90", 1299.9),
+        ("1.234.567", 1234567.0),
+        ("₺1.299,90", 1299.9),
+        ("199,90", 199.9),
+        ("", None),
+        ("TL", None),
+        (None, None),
+        (float("nan"), None),
+        (349, 349.0),
+    ],
+)
+def test_documented_cases(text, expected):
+    assert _same(prices.parse_price(text), expected)
+    assert _same(price_to_float(text), expected)
+    assert _same(prices.parse_price_series(pd.Series([text], dtype=object)).iloc[0], expected)
+
+
+# -------------------------------
+# ÖZELLİK TESTLERİ
+# -------------------------------
+@settings(max_examples=500, deadline=None)
+@given(st.lists(price_like, max_size=30))
+def test_series_matches_scalar_on_any_text(values):
+    got = prices.parse_price_series(pd.Series(values, dtype=object))
+    for v, g in zip(values, got):
+        assert _same(prices.parse_price(v), g), v
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.lists(st.one_of(price_like, st.floats(allow_infinity=False), st.integers(-10 ** 6, 10 ** 6), st.none()),
+                max_size=20))
+def test_series_matches_scalar_on_mixed_column(values):
+    got = prices.parse_price_series(pd.Series(values, dtype=object))
+    for v, g in zip(values, got):
+        assert _same(prices.parse_price(v), g), v
+
+
+@settings(max_examples=500, deadline=None)
+@given(tr_prices())
+def test_tr_format_round_trips(case):
+    text, kurus = case
+    assert _same(price_to_float(text), kurus / 100), text
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.lists(tr_prices(), min_size=1, max_size=20))
+def test_read_products_agrees_with_price_to_float(cases):
+    # main.read_products: scrape_products'ın yazdığı biçimde (utf-8-sig, ';') CSV
+    with tempfile.TemporaryDirectory() as d, pytest.MonkeyPatch.context() as mp:
+        path = Path(d) / "TRM_PRODUCTS.csv"
+        df = pd.DataFrame({"name": [f"ürün {i}" for i in range(len(cases))], "price": [t for t, _ in cases]})
+        df.to_csv(path, index=False, sep=";", encoding="utf-8-sig")
+        mp.setattr(main, "PROD_CSV", path)
+        got = main.read_products()["price"]
+    for (text, _), g in zip(cases, got):
+        assert _same(price_to_float(text), g), text
+
+
+@settings(max_examples=200, deadline=None)
+@given(tr_prices(), st.booleans())
+def test_scrape_site_path_agrees_with_price_to_float(case, in_price_tag):
+    # scrape_site: fiyat .price içinde ya da yalnızca kart metninde ("… TL")
+    text, _ = case
+    if not in_price_tag and "tl" not in text.lower():
+        text += " TL"
+    price_html = f'<span class="price">{text}</span>' if in_price_tag else f"<p>{text}</p>"
+    html = f'<div class="product"><a href="/urun-1"><h3>Ürün</h3></a>{price_html}</div>'
+    items = scrape_site.parse_list_items(BeautifulSoup(html, "html.parser"))
+    assert len(items) == 1
+    assert _same(prices.parse_price(items[0]["price"]), price_to_float(text)), text
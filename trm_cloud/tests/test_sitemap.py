@@ -0,0 +1,124 @@
+# trm_cloud/tests/test_sitemap.py
+# -*- coding: utf-8 -*-
+"""
+Sitemap keşfi: fixtures/ üzerindeki index → alt sitemap akışı, .gz, uzak
+dosyanın akışla (r.raw) okunması ve büyük sitemap'te belleğin sabit kalması.
+"""
+
+import functools
+import gzip
+import http.server
+import io
+import os
+import shutil
+import tempfile
+import threading
+import tracemalloc
+
+import pytest
+
+import fetch
+import sitemap
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+INDEX = os.path.join(FIXTURE_DIR, "sitemap.xml")
+PRODUCTS = os.path.join(FIXTURE_DIR, "sitemap_products.xml")
+
+
+def _urlset(n: int) -> bytes:
+    body = "".join(
+        f"<url><loc>https://example.com/urun/urun-{i}-P{i}/</loc><lastmod>2024-06-01</lastmod></url>"
+        for i in range(n)
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>').encode()
+
+
+def test_index_resolves_relative_child():
+    direct = list(sitemap.iter_sitemap(PRODUCTS))
+    assert list(sitemap.iter_sitemap(INDEX)) == direct
+    assert len(direct) == 34
+
+
+def test_product_urls_match_pattern():
+    urls = list(sitemap.iter_product_urls(INDEX))
+    assert urls and all(sitemap.PRODUCT_MATCH.search(u) for u in urls)
+    assert "https://www.trendurunlermarket.com/hakkimizda/" not in urls
+    assert len(urls) == len(set(urls))
+
+
+def test_gzip_sitemap():
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(INDEX, tmp)
+        with open(PRODUCTS, "rb") as src, gzip.open(os.path.join(tmp, "sitemap_products.xml"), "wb") as dst:
+            dst.write(src.read())
+        assert list(sitemap.iter_product_urls(os.path.join(tmp, "sitemap.xml"))) == \
+            list(sitemap.iter_product_urls(INDEX))
+
+
+class _StreamResponse:
+    """Yalnızca r.raw üzerinden okunabilen yanıt; .content'e dokunulursa test düşer."""
+
+    def __init__(self, data: bytes):
+        self.raw = io.BytesIO(data)
+        self.closed = False
+
+    @property
+    def content(self):
+        raise AssertionError("sitemap belleğe indirildi")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_remote_sitemap_is_streamed(monkeypatch, packed):
+    with open(PRODUCTS, "rb") as f:
+        data = f.read()
+    responses = []
+
+    def fake_get(url, headers=None, stream=False, **kw):
+        assert stream
+        responses.append(_StreamResponse(gzip.compress(data) if packed else data))
+        return responses[-1]
+
+    monkeypatch.setattr(fetch, "get", fake_get)
+    got = list(sitemap.iter_sitemap("https://example.com/sitemap_products.xml"))
+    assert got == list(sitemap.iter_sitemap(PRODUCTS))
+    assert responses[0].closed
+
+
+def test_remote_sitemap_over_http():
+    # gerçek requests/urllib3 yanıtı: r.raw gövde bitince kendiliğinden kapanmamalı
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=FIXTURE_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/sitemap_products.xml"
+        assert list(sitemap.iter_sitemap(url)) == list(sitemap.iter_sitemap(PRODUCTS))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _peak(path: str) -> tuple:
+    tracemalloc.start()
+    try:
+        n = sum(1 for _ in sitemap.iter_sitemap(path))
+        return n, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_does_not_grow_with_sitemap_size():
+    with tempfile.TemporaryDirectory() as tmp:
+        small, big = os.path.join(tmp, "small.xml"), os.path.join(tmp, "big.xml")
+        with open(small, "wb") as f:
+            f.write(_urlset(2000))
+        with open(big, "wb") as f:
+            f.write(_urlset(20000))
+        n_small, peak_small = _peak(small)
+        n_big, peak_big = _peak(big)
+    assert (n_small, n_big) == (2000, 20000)
+    # işlenen <url>'ler ağaçta kalsaydı tepe bellek ~10 kat büyürdü
+    assert peak_big < 2 * peak_small
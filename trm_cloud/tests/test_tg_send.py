@@ -0,0 +1,70 @@
+# trm_cloud/tests/test_tg_send.py
+# -*- coding: utf-8 -*-
+"""
+Gönderim zamanlayıcısı + depo: MAX_ATTEMPTS aşılıp düşülen iş SKU'yu
+"gönderilmiş" olarak kilitlemez; sonraki koşuda yeniden seçilebilir.
+"""
+
+import asyncio
+import os
+import tempfile
+
+import tg_send
+from post_store import PostStore
+from tg_send import SendScheduler, job_skus
+
+
+class FailingClient:
+    async def send_message(self, peer, msg, link_preview=True):
+        raise RuntimeError("bağlantı koptu")
+
+
+class OkClient:
+    async def send_message(self, peer, msg, link_preview=True):
+        return type("Msg", (), {"id": 42})()
+
+
+def _job(sku, target="@kanal", attempts=0):
+    return {"sku": sku, "name": sku, "url": f"https://x/{sku}", "target": target, "msg": sku, "attempts": attempts}
+
+
+def _run(client, jobs, store, monkeypatch):
+    monkeypatch.setattr(tg_send, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(tg_send, "GLOBAL_BURST", 100.0)
+    scheduler = SendScheduler(client, {"@kanal": object()})
+
+    def on_done(job, ok):
+        store.record(job["sku"], job["target"], job["url"], job["name"], job.get("message_id") if ok else None)
+
+    asyncio.run(scheduler.run(jobs, on_done))
+    store.release((sku, job["target"]) for job in scheduler.dropped for sku in job_skus(job))
+    return scheduler
+
+
+def test_dropped_job_is_released(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp, PostStore(os.path.join(tmp, "p.sqlite"), legacy_log=None) as store:
+        # ilk deneme: kuyruğa alınır, SKU kuyrukta beklerken alınmış sayılır
+        s = _run(FailingClient(), [_job("S9")], store, monkeypatch)
+        assert [j["sku"] for j in s.failed] == ["S9"] and not s.dropped
+        assert store.posted(["S9"]) == {"S9"}
+
+        # ikinci deneme MAX_ATTEMPTS'a ulaşır: düşülür, kayıt silinir
+        s = _run(FailingClient(), s.failed, store, monkeypatch)
+        assert s.failed == [] and [j["sku"] for j in s.dropped] == ["S9"]
+        assert store.posted(["S9"]) == set()
+
+
+def test_release_keeps_delivered_rows(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp, PostStore(os.path.join(tmp, "p.sqlite"), legacy_log=None) as store:
+        _run(OkClient(), [_job("S1")], store, monkeypatch)
+        assert store.release([("S1", "@kanal")]) == 0
+        assert store.posted(["S1"]) == {"S1"}
+        assert store.pending() == set()
+
+
+def test_pending_ignores_legacy_rows():
+    with tempfile.TemporaryDirectory() as tmp, PostStore(os.path.join(tmp, "p.sqlite"), legacy_log=None) as store:
+        store.record("OLD")                     # eski CSV logundan (hedef "")
+        store.record("Q1", "@kanal")            # kuyrukta
+        assert store.pending() == {("Q1", "@kanal")}
+        assert store.posted(["OLD", "Q1"]) == {"OLD", "Q1"}
@@ -1,64 +1,267 @@
 # trm_cloud/tg_pull.py
 # -*- coding: utf-8 -*-
+"""
+Kaynak kanallardan mesaj çekme (asyncio)
+----------------------------------------
+- TELEGRAM_SOURCE çoklu kaynak alır (post_telegram ile aynı biçim, tg_sources.py);
+  kaynaklar aynı anda en fazla TELEGRAM_PULL_CONCURRENCY tanesi olacak şekilde
+  paralel çekilir. Her kaynak kendi dosyasına yazar:
+  trm_reports/TELEGRAM_PULL_<kaynak>.csv. Satırlar geldikçe diske yazılır.
+- Varsayılan: kaynak başına son TELEGRAM_LIMIT mesaj (dosya baştan yazılır).
+- TELEGRAM_INCREMENTAL=1: kaynak başına en yüksek mesaj id'si
+  TELEGRAM_PULL_STATE.json'da tutulur; yalnızca daha yeni mesajlar
+  (iter_messages(min_id=...)) çekilip CSV'ye eklenir. Aynı id iki kez yazılmaz.
+- TELEGRAM_BACKFILL=1: eldeki en eski mesajdan geriye doğru
+  TELEGRAM_BACKFILL_CHUNK'lık parçalarla geçmiş çekilir; her parçadan sonra
+  durum kaydedilir, yarıda kalırsa sonraki koşu kaldığı yerden sürer.
+- TELEGRAM_METRICS=1: her koşuda kaynak başına son TELEGRAM_METRICS_RECENT
+  mesajın izlenme/iletme/yanıt sayıları metrics_store'a anlık görüntü olarak eklenir.
+"""
+
 import os
+import json
+import time
+import asyncio
 from pathlib import Path
 import csv
-from telethon.sync import TelegramClient
+from telethon import TelegramClient
 from telethon.sessions import StringSession
 from telethon.errors.rpcerrorlist import ChannelPrivateError, ChannelInvalidError
 
+from metrics_store import MetricsStore
+from tg_sources import load_sources, source_slug
+
 API_ID = int(os.getenv("TELEGRAM_API_ID", "0"))
 API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 SESSION = os.getenv("TELEGRAM_SESSION", "")  # StringSession
-SOURCE = os.getenv("TELEGRAM_SOURCE", "")    # @kanal / @grup / t.me linki
 LIMIT  = int(os.getenv("TELEGRAM_LIMIT", "200"))
+CONCURRENCY = int(os.getenv("TELEGRAM_PULL_CONCURRENCY", "3") or "3")  # aynı anda çekilen kaynak
+INCREMENTAL = os.getenv("TELEGRAM_INCREMENTAL", "0") == "1"
+BACKFILL = os.getenv("TELEGRAM_BACKFILL", "0") == "1"
+BACKFILL_CHUNK = int(os.getenv("TELEGRAM_BACKFILL_CHUNK", "500") or "500")
+BACKFILL_MAX_CHUNKS = int(os.getenv("TELEGRAM_BACKFILL_MAX_CHUNKS", "20") or "20")  # koşu başına
+METRICS = os.getenv("TELEGRAM_METRICS", "0") == "1"
+METRICS_RECENT = int(os.getenv("TELEGRAM_METRICS_RECENT", "200") or "200")
 
 OUT_DIR = Path("trm_reports")
 OUT_DIR.mkdir(exist_ok=True, parents=True)
-OUT_CSV = OUT_DIR / "TELEGRAM_PULL.csv"
+STATE_FILE = OUT_DIR / "TELEGRAM_PULL_STATE.json"
+FIELDS = ["id","date","sender_id","text","views","forwards","replies","link"]
+
+
+def out_csv(source):
+    return OUT_DIR / f"TELEGRAM_PULL_{source_slug(source)}.csv"
+
+
+def to_row(msg, entity):
+    username = getattr(entity, "username", "") or ""
+    return {
+        "id": msg.id,
+        "date": msg.date.isoformat() if msg.date else "",
+        "sender_id": getattr(msg, "sender_id", ""),
+        "text": (getattr(msg, "message", "") or "").replace("\n", " ").strip(),
+        "views": getattr(msg, "views", ""),
+        "forwards": getattr(msg, "forwards", ""),
+        "replies": getattr(getattr(msg, "replies", None), "replies", ""),
+        "link": f"https://t.me/{username}/{msg.id}" if username else ""
+    }
+
+
+# -------------------------------
+# DURUM + EKLEMELİ DEPO
+# -------------------------------
+def load_state():
+    if not STATE_FILE.exists():
+        return {}
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except ValueError:
+        print(f"{STATE_FILE} okunamadı, baştan başlanıyor.")
+        return {}
+
+
+def save_state(state):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
+
+class PullStore:
+    """
+    Satırları geldikçe CSV'ye yazar. append=True: dosyadaki id'ler bir kez
+    okunur, tekrarlar atlanır; append=False: dosya baştan yazılır.
+    """
+
+    def __init__(self, path, append=True):
+        self.path = Path(path)
+        self.ids = set()
+        if append and self.path.exists():
+            with self.path.open("r", newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    if r.get("id"):
+                        self.ids.add(int(r["id"]))
+        self._f = self.path.open("a" if append else "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=FIELDS)
+        if self._f.tell() == 0:
+            self._w.writeheader()
+        self.added = 0
+
+    def add(self, row):
+        if row["id"] in self.ids:
+            return False
+        self.ids.add(row["id"])
+        self._w.writerow(row)
+        self.added += 1
+        return True
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+# -------------------------------
+# ÇEKME MODLARI
+# -------------------------------
+async def pull_latest(client, entity, store):
+    n = 0
+    async for msg in client.iter_messages(entity, limit=LIMIT):
+        if not msg:
+            continue
+        store.add(to_row(msg, entity))
+        n += 1
+    store.flush()
+    return n
 
-def main():
-    if not (API_ID and API_HASH and SESSION and SOURCE):
+
+async def pull_incremental(client, entity, store, st):
+    """
+    min_id'den yeni mesajlar eskiden yeniye (reverse=True): max_id yalnızca
+    okunup yazılan mesajlar kadar ilerler, yarıda kesilen koşu kaldığı yerden
+    devam eder. İlk koşuda son LIMIT mesaj (yeniden eskiye); max_id ancak
+    döngü bitince yazılır.
+    """
+    max_id = st.get("max_id", 0)
+    kwargs = {"min_id": max_id, "limit": None, "reverse": True} if max_id else {"limit": LIMIT}
+    newest = max_id
+    n = 0
+    async for msg in client.iter_messages(entity, **kwargs):
+        if not msg:
+            continue
+        store.add(to_row(msg, entity))
+        newest = max(newest, msg.id)
+        if max_id:
+            st["max_id"] = newest
+        # geriye doğru doldurma en eski görülen mesajdan başlar
+        if not st.get("backfill_done") and msg.id < st.get("backfill_before", msg.id + 1):
+            st["backfill_before"] = msg.id
+        n += 1
+    st["max_id"] = newest
+    store.flush()
+    return n
+
+
+async def backfill(client, entity, store, st, state):
+    """backfill_before'dan eskiye parça parça; her parçadan sonra durum yazılır."""
+    n = 0
+    for _ in range(BACKFILL_MAX_CHUNKS):
+        if st.get("backfill_done"):
+            break
+        before = st.get("backfill_before", 0)
+        got = 0
+        async for msg in client.iter_messages(entity, offset_id=before, limit=BACKFILL_CHUNK):
+            if not msg:
+                continue
+            store.add(to_row(msg, entity))
+            st["max_id"] = max(st.get("max_id", 0), msg.id)
+            st["backfill_before"] = msg.id
+            got += 1
+        store.flush()
+        n += got
+        if got < BACKFILL_CHUNK:
+            st["backfill_done"] = True
+        save_state(state)
+    return n
+
+
+async def snapshot_metrics(client, entity, source, metrics, ts, chunk=100):
+    """Son METRICS_RECENT mesajın etkileşim sayıları; parça parça yazılır."""
+    n = 0
+    buf = []
+    async for msg in client.iter_messages(entity, limit=METRICS_RECENT):
+        if not msg:
+            continue
+        buf.append(to_row(msg, entity))
+        if len(buf) >= chunk:
+            n += metrics.record(source, buf, ts)
+            buf = []
+    if buf:
+        n += metrics.record(source, buf, ts)
+    return n
+
+
+async def pull_source(client, source, state, sem, metrics=None, ts=None):
+    async with sem:
+        try:
+            entity = await client.get_entity(source)
+        except (ChannelPrivateError, ChannelInvalidError) as e:
+            print(f"[{source}] Kaynağa erişilemedi: {e}")
+            return
+        except Exception as e:
+            print(f"[{source}] Kaynak okunamadı: {e}")
+            return
+
+        if metrics is not None:
+            n = await snapshot_metrics(client, entity, source, metrics, ts)
+            print(f"[{source}] {n} mesajın etkileşim görüntüsü kaydedildi")
+
+        path = out_csv(source)
+        if not (INCREMENTAL or BACKFILL):
+            store = PullStore(path, append=False)
+            try:
+                n = await pull_latest(client, entity, store)
+            finally:
+                store.close()
+            print(f"[{source}] OK | {n} mesaj yazıldı -> {path}")
+            return
+
+        st = state.setdefault(source, {})
+        store = PullStore(path)
+        new = old = 0
+        try:
+            new = await pull_incremental(client, entity, store, st) if INCREMENTAL else 0
+            save_state(state)
+            old = await backfill(client, entity, store, st, state) if BACKFILL else 0
+        finally:
+            store.close()
+            save_state(state)
+        print(f"[{source}] OK | {new} yeni + {old} eski mesaj, {store.added} satır eklendi -> {path} "
+              f"(max_id={st.get('max_id', 0)})")
+
+
+async def run():
+    sources = load_sources()
+    if not (API_ID and API_HASH and SESSION and sources):
         print("Eksik env: TELEGRAM_API_ID / TELEGRAM_API_HASH / TELEGRAM_SESSION / TELEGRAM_SOURCE")
         return
 
     client = TelegramClient(StringSession(SESSION), API_ID, API_HASH)
-    client.connect()
-    if not client.is_user_authorized():
+    await client.connect()
+    if not await client.is_user_authorized():
         print("Yetkisiz oturum (SESSION yanlış/expired olabilir).")
         return
 
+    state = load_state() if (INCREMENTAL or BACKFILL) else {}
+    sem = asyncio.Semaphore(max(1, CONCURRENCY))
+    metrics = MetricsStore() if METRICS else None
+    ts = int(time.time())  # koşu başına tek görüntü zamanı
     try:
-        entity = client.get_entity(SOURCE)
-    except (ChannelPrivateError, ChannelInvalidError) as e:
-        print(f"Kaynağa erişilemedi: {e}")
-        return
-    except Exception as e:
-        print(f"Kaynak okunamadı: {e}")
-        return
-
-    rows = []
-    for msg in client.iter_messages(entity, limit=LIMIT):
-        if not msg:
-            continue
-        rows.append({
-            "id": msg.id,
-            "date": msg.date.isoformat() if msg.date else "",
-            "sender_id": getattr(msg, "sender_id", ""),
-            "text": (getattr(msg, "message", "") or "").replace("\n", " ").strip(),
-            "views": getattr(msg, "views", ""),
-            "forwards": getattr(msg, "forwards", ""),
-            "replies": getattr(getattr(msg, "replies", None), "replies", ""),
-            "link": f"https://t.me/{getattr(entity, 'username', '')}/{msg.id}" if getattr(entity, "username", "") else ""
-        })
-
-    with OUT_CSV.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["id","date","sender_id","text","views","forwards","replies","link"])
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-    print(f"OK | {len(rows)} mesaj yazıldı -> {OUT_CSV}")
+        await asyncio.gather(*(pull_source(client, src, state, sem, metrics, ts) for src in sources))
+    finally:
+        if metrics is not None:
+            metrics.close()
+        await client.disconnect()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(run())
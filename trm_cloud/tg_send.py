@@ -0,0 +1,183 @@
+# trm_cloud/tg_send.py
+# -*- coding: utf-8 -*-
+"""
+Telegram gönderim zamanlayıcısı (post_telegram.py kullanır)
+-----------------------------------------------------------
+- Sohbet başına ve global token-bucket: Telegram sınırlarının altında kalıp
+  (sohbet başına ~20 mesaj/dk, hesap geneli ~1 mesaj/sn) hedefleri paralel besler.
+- FloodWaitError: yalnızca o sohbetin kovası e.seconds kadar kapatılır ve iş
+  yeniden denenir; bekleme FLOOD_MAX'tan uzunsa iş kuyruğa bırakılır.
+- Başarısız işler diskteki yeniden deneme kuyruğuna (JSONL) yazılır; sonraki
+  koşu önce bu kuyruğu boşaltır. MAX_ATTEMPTS aşılan iş uyarıyla düşülür ve
+  dropped listesine eklenir (çağıran depodaki kaydını siler).
+
+İş (job) düz bir dict:
+- metin: {"sku", "name", "url", "target", "msg", "attempts"}; başarılı
+  gönderimde "message_id" eklenir.
+- albüm: {"target", "items": [{"sku", "name", "url", "image", "caption"}], "attempts"};
+  görseller media(urls) ile koşu başına bir kez yüklenmiş InputMediaPhoto'lara
+  çevrilir (hedefler arası yeniden yükleme / UploadMedia yok),
+  başarılı gönderimde "message_ids" eklenir.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from telethon.errors import ChannelInvalidError, ChannelPrivateError, FloodWaitError, PeerIdInvalidError
+
+from ratelimit import TokenBucket
+
+CONCURRENCY = int(os.getenv("TELEGRAM_CONCURRENCY", "3") or "3")              # aynı anda gönderilen hedef
+CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "3") or "3")        # aynı sohbete iki mesaj arası (sn)
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "1") or "1")            # hesap geneli mesaj/sn
+GLOBAL_BURST = float(os.getenv("TELEGRAM_GLOBAL_BURST", "3") or "3")
+FLOOD_MAX = int(os.getenv("TELEGRAM_FLOOD_MAX", "300") or "300")              # bundan uzun bekleme → kuyruğa
+MAX_ATTEMPTS = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "5") or "5")
+ALBUM_MAX = 10       # Telegram medya grubu sınırı
+CAPTION_MAX = 1024   # medya açıklaması sınırı
+
+STALE_PEER_ERRORS = (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError, ValueError)
+
+
+def job_skus(job: Dict) -> List[str]:
+    if "items" in job:
+        return [it["sku"] for it in job["items"]]
+    return [job["sku"]]
+
+
+# -------------------------------
+# DİSK KUYRUĞU
+# -------------------------------
+def load_queue(path: str) -> List[Dict]:
+    jobs = []
+    if not os.path.exists(path):
+        return jobs
+    with open(path, "r", encoding="utf-8") as f:
+        for ln in f:
+            ln = ln.strip()
+            if not ln:
+                continue
+            try:
+                jobs.append(json.loads(ln))
+            except ValueError:
+                print(f"[TG] Kuyrukta bozuk satır atlandı: {ln[:80]}")
+    return jobs
+
+
+def save_queue(path: str, jobs: List[Dict]):
+    if not jobs:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+# -------------------------------
+# ZAMANLAYICI
+# -------------------------------
+class SendScheduler:
+    """
+    Hedef başına bir işçi; işçiler paralel (en fazla CONCURRENCY), her biri kendi
+    sırasını korur. on_done(job, ok) her iş bittiğinde (gönderildi ya da
+    kuyruğa alındı) çağrılır.
+    """
+
+    def __init__(self, client, peers: Dict, refresh: Optional[Callable[[str], Awaitable]] = None,
+                 media: Optional[Callable[[List[str]], Awaitable[List]]] = None):
+        self.client = client
+        self.peers = dict(peers)
+        self.refresh = refresh
+        self.media = media
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.failed: List[Dict] = []
+        self.dropped: List[Dict] = []
+        self.sent = 0
+
+    def _bucket(self, target: str) -> TokenBucket:
+        b = self.chat_buckets.get(target)
+        if b is None:
+            b = self.chat_buckets[target] = TokenBucket(1.0 / max(CHAT_INTERVAL, 0.01))
+        return b
+
+    def _fail(self, job: Dict, err):
+        job = dict(job, attempts=job.get("attempts", 0) + 1, last_error=str(err)[:200], ts=int(time.time()))
+        if job["attempts"] >= MAX_ATTEMPTS:
+            print(f"[TG] '{job['target']}' / {','.join(job_skus(job))} {job['attempts']} denemede gönderilemedi, düşüldü: {err}")
+            self.dropped.append(job)
+            return
+        self.failed.append(job)
+
+    async def _deliver(self, peer, job: Dict):
+        if "items" not in job:
+            m = await self.client.send_message(peer, job["msg"], link_preview=True)
+            job["message_id"] = getattr(m, "id", None)
+            return
+        files = await self.media([it["image"] for it in job["items"]])
+        msgs = await self.client.send_file(peer, files, caption=[it["caption"] for it in job["items"]])
+        msgs = msgs if isinstance(msgs, list) else [msgs]
+        job["message_ids"] = [getattr(m, "id", None) for m in msgs]
+
+    async def _send_one(self, job: Dict) -> bool:
+        target = job["target"]
+        bucket = self._bucket(target)
+        refreshed = False
+        if "items" in job and self.media is None:
+            self._fail(job, "albüm için medya yükleyici yok")
+            return False
+        while True:
+            peer = self.peers.get(target)
+            if peer is None:
+                self._fail(job, "hedef çözülemedi")
+                return False
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self._deliver(peer, job)
+                self.sent += 1
+                return True
+            except FloodWaitError as e:
+                if e.seconds > FLOOD_MAX:
+                    print(f"[TG] '{target}' flood wait {e.seconds}s; iş kuyruğa alındı.")
+                    bucket.pause(e.seconds)
+                    self._fail(dict(job, attempts=job.get("attempts", 0) - 1), e)  # deneme sayılmaz
+                    return False
+                # yalnızca bu sohbet bekler, diğer hedefler devam eder
+                print(f"[TG] '{target}' flood wait: {e.seconds}s bekleniyor…")
+                bucket.pause(e.seconds + 1)
+            except STALE_PEER_ERRORS as ex:
+                # önbellekteki peer bayat olabilir: bir kez yeniden çöz
+                if refreshed or self.refresh is None:
+                    print(f"[TG] '{target}' için hata: {ex}")
+                    self._fail(job, ex)
+                    return False
+                refreshed = True
+                self.peers[target] = await self.refresh(target)
+            except Exception as ex:
+                print(f"[TG] '{target}' için hata: {ex}")
+                self._fail(job, ex)
+                return False
+
+    async def run(self, jobs: List[Dict], on_done: Optional[Callable[[Dict, bool], None]] = None):
+        by_target: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        for job in jobs:
+            by_target.setdefault(job["target"], []).append(job)
+
+        sem = asyncio.Semaphore(max(1, CONCURRENCY))
+
+        async def worker(target_jobs: List[Dict]):
+            async with sem:
+                for job in target_jobs:
+                    ok = await self._send_one(job)
+                    if on_done is not None:
+                        on_done(job, ok)
+
+        await asyncio.gather(*(worker(js) for js in by_target.values()))
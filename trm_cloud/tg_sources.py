@@ -0,0 +1,37 @@
+# trm_cloud/tg_sources.py
+# -*- coding: utf-8 -*-
+"""
+TELEGRAM_SOURCE ayrıştırma (post_telegram.py ve tg_pull.py ortak kullanır).
+Satır, virgül ile ayrılmış liste; t.me linkleri @handle'a çevrilir.
+"""
+
+import os
+import re
+
+SOURCES_RAW = os.getenv("TELEGRAM_SOURCE", "")  # çoklu satır destekli
+
+
+def load_sources(raw=None):
+    raw = SOURCES_RAW if raw is None else raw
+    if not raw.strip():
+        return []
+    # newline, virgül ve boşluk ayırıcı
+    parts = []
+    for ln in raw.replace(",", "\n").splitlines():
+        s = ln.strip()
+        if not s:
+            continue
+        # t.me/ links → @handle
+        if "t.me/" in s and not s.startswith("@"):
+            s = s.split("t.me/")[-1].strip("/")
+            if not s.startswith("@"):
+                s = f"@{s}"
+        parts.append(s)
+    # aynı kaynak iki kez yazılmışsa bir kez
+    return list(dict.fromkeys(parts))
+
+
+def source_slug(source):
+    """Kaynak başına dosya adı parçası: '@kanal' → 'kanal'."""
+    slug = re.sub(r"[^0-9A-Za-z_-]+", "_", source.lstrip("@")).strip("_")
+    return slug or "source"
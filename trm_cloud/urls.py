@@ -0,0 +1,42 @@
+# trm_cloud/urls.py
+# -*- coding: utf-8 -*-
+"""
+Ürün URL'lerinin kanonik biçimi (SKU indeksi ve tekilleştirme anahtarı).
+- şema/host küçük harf, "www." ve varsayılan port atılır
+- fragment (#...) atılır, sondaki "/" atılır (kök hariç)
+- izleme parametreleri (utm_*, gclid, fbclid, ...) atılır, kalanlar sıralanır
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+TRACKING_PARAMS = frozenset({
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "igshid", "srsltid", "ttclid",
+    "_ga", "_gl", "mc_cid", "mc_eid", "ref", "ref_src", "affiliate", "aff_id",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))